@@ -10,6 +10,15 @@ import traceback
 import zipfile
 import tempfile
 import time
+import json
+import mmap
+import zlib
+import queue
+import struct
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 # --- EMBEDDED SCRIPTS ---
 # The code for the other python files is stored here as strings
@@ -17,13 +26,21 @@ import time
 
 AUTO_MANAGER_CODE = r'''
 import os
-import shutil
 import sys
 import time
-import subprocess
+import json
+import queue
+import select
+import signal
+import struct
+import sqlite3
+import argparse
+import itertools
+import threading
+from collections import deque
 from datetime import datetime
-import tkinter as tk
-from tkinter import messagebox, Toplevel, Button, Label
+# tkinter, subprocess and concurrent.futures are imported where they are first used:
+# this script starts at every login, and most runs never show a dialog or relaunch Roblox.
 
 # User requested token for scripts
 # mvy9amhku0l3b2kq0cemzduy6czqm8
@@ -32,223 +49,1270 @@ from tkinter import messagebox, Toplevel, Button, Label
 try:
     import psutil
 except ImportError:
-    sys.exit("Error: psutil library not found.")
+    psutil = None # The built-in process probes below are used instead
+
+from font_store import BackupRetention, BackupStores, HashCache, store_root_for
+from font_deploy import FontDeployer, STAGING_FOLDER_NAME, recover as recover_swap
+from font_engine import describe_deployment, execute_folder, execute_plan, plan_deployment
+from font_log import LogSink
+from font_index import DirectoryIndex
+from font_metrics import CycleMetrics
 
 # --- Configuration ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(sys.argv[0]))
 SOURCE_FOLDER_NAME = "PLACE YOUR CUSTOM FONT HERE"
 SOURCE_FOLDER_PATH = os.path.join(SCRIPT_DIR, SOURCE_FOLDER_NAME)
 LOG_FILE_PATH = os.path.join(SCRIPT_DIR, "font_manager.log")
-ROBLOX_VERSIONS_PATH = os.path.join(os.path.expanduser('~'), 'AppData', 'Local', 'Roblox', 'Versions')
+LOG_MAX_BYTES = 1024 * 1024 # font_manager.log is rotated at this size, keeping LOG_BACKUP_COUNT old files
+LOG_BACKUP_COUNT = 3
+LOG_JSON_LINES = False # Write structured JSON lines instead of plain text; "log_json_lines" in the policy file or --log-json turn it on
+STATE_DB_PATH = os.path.join(SCRIPT_DIR, "font_manager_state.db")
+POLICY_FILE_PATH = os.path.join(SCRIPT_DIR, "font_manager_policy.json")
+BACKUP_COMPRESSION = None # None, "zlib" or "lzma"
+DEPLOY_MODE = "link" # "link" writes the font once per drive and hardlinks the rest, "copy" writes every file
+ROBLOX_VERSIONS_PATH = os.environ.get('RFM_ROBLOX_VERSIONS_PATH') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local', 'Roblox', 'Versions')
+ROBLOX_PROCESS_NAME = "RobloxPlayerBeta.exe"
 CHECK_INTERVAL_SECONDS = 15
+PROCESS_RESCAN_SECONDS = 300 # How often the process tracker re-checks every PID instead of only new ones
+POLL_INTERVAL_SECONDS = 2 # Only used by the polling fallback when no native change notification is available
+VERSION_DEBOUNCE_SECONDS = 5 # A new version folder must stay unchanged this long before it is acted on
+FULL_RESCAN_SECONDS = 300 # Safety net for changes the watcher cannot see (e.g. a Fonts.old folder deleted by hand)
+REPLACEMENT_WORKERS = 4 # How many version folders are processed at the same time
+JOB_POLL_SECONDS = 1 # Cycle interval while replacement jobs are running
+UPDATE_POLICIES = ("ask", "now", "later", "skip") # "ask" shows the dialog; the others answer it automatically
+MAX_JOBS_PER_ROOT = 2 # With several roots: replacements running at once for any one root, so one busy profile cannot starve the rest
+ROOT_DISCOVERY_SECONDS = 3600 # How often discover_roots looks for user profiles that got Roblox since the start
+ROOT_LOCK_NAME = "font_manager.lock" # Next to each managed 'Versions' folder, locked for as long as one manager looks after it
+DEFAULT_POLICY = {"update_policy": "ask", "restart_roblox": True, "backup_keep_last": 3, "backup_max_age_days": 90, "backup_max_mb": 500,
+                  "roblox_roots": [], "discover_roots": False, "max_jobs_per_root": MAX_JOBS_PER_ROOT, "log_json_lines": LOG_JSON_LINES}
+HISTORY_FILE_PATH = os.path.join(SCRIPT_DIR, "font_manager_history.txt") # Folders the manual manager has replaced fonts in
+RETENTION_INTERVAL_SECONDS = 6 * 3600 # How often old backups and unused blobs are cleaned up
+RETENTION_STEP_PAUSE = 0.05 # Pause between retention steps, so the cleanup never competes with Roblox for the disk
+METRICS_FILE_PATH = os.path.join(SCRIPT_DIR, "font_manager_metrics.jsonl") # Used by --metrics without a path
+PROMPT_LIST_LIMIT = 5 # Versions listed by name in the update dialog
+PROMPT_POLL_MS = 200 # How often the dialog's UI thread checks for newly offered versions
 
 # --- Global State ---
-pending_updates = set()
-session_ignored_versions = set() # Prevents asking for the same version repeatedly in one session
+roblox_roots = [ROBLOX_VERSIONS_PATH] # Every Roblox 'Versions' folder being managed; main() sets it from the policy and arguments
+root_locks = {} # root_key() -> RootLock this process holds
+backup_stores = BackupStores(BACKUP_COMPRESSION) # Each Roblox install's backups keep their blobs next to it, never in SCRIPT_DIR
+dir_index = DirectoryIndex() # Folder listings, rescanned only when a folder's mtime changes
+hash_cache = HashCache() # Shared by every deployment, so a font file is hashed once per change
+metrics = CycleMetrics() # Disabled unless main() is started with --metrics, --status or --profile-cycles
 
 # --- Logging Setup ---
-def log(message):
-    """Appends a timestamped message to the log file."""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    log_message = f"[{timestamp}] {message}\n"
-    with open(LOG_FILE_PATH, 'a', encoding='utf-8') as f:
-        f.write(log_message)
-    print(log_message.strip())
+log_sink = LogSink(LOG_FILE_PATH, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT, json_lines=LOG_JSON_LINES, echo=True)
+
+def log(message, **fields):
+    """Queues a timestamped message for the background log writer."""
+    log_sink.write(message, **fields)
 
 # --- GUI Dialog ---
-def ask_update_preference(version_name):
-    """Shows a custom dialog box asking the user what to do."""
-    root = tk.Tk()
-    root.title("Roblox Update Detected")
-    
-    window_height = 150
-    window_width = 440
-    screen_width = root.winfo_screenwidth()
-    screen_height = root.winfo_screenheight()
-    x_cordinate = int((screen_width/2) - (window_width/2))
-    y_cordinate = int((screen_height/2) - (window_height/2))
-    root.geometry(f"{window_width}x{window_height}+{x_cordinate}+{y_cordinate}")
+class UpdatePrompt:
+    """The update dialog, on a long-lived UI thread so the monitor keeps cycling while it is open.
 
-    root.resizable(False, False)
-    root.attributes("-topmost", True)
+    offer() hands (root, version) keys to the UI thread through a queue. Versions offered while the
+    dialog is already open are added to it, so one answer covers all of them. Answers
+    come back through poll() as (choice, versions) pairs, choice being "now", "later"
+    or "cancel".
+    """
 
-    result = {"choice": "cancel"}
+    def __init__(self):
+        self.requests = queue.Queue() # monitor -> UI: sets of versions to ask about
+        self.answers = queue.Queue() # UI -> monitor: (choice, versions)
+        self.awaiting = set() # Offered versions without an answer yet; only used by the monitor thread
+        self.thread = None
+        self.dialog = None # The open dialog and what it shows; only used by the UI thread
+        self.shown = set()
 
-    def on_choice(choice):
-        result["choice"] = choice
-        root.destroy()
+    def offer(self, versions):
+        versions = set(versions) - self.awaiting
+        if not versions: return
+        self.awaiting.update(versions)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="rfm-prompt", daemon=True)
+            self.thread.start()
+        self.requests.put(versions)
 
-    Label(root, text=f"Roblox update detected for version:\n{version_name[:25]}...", font=("Segoe UI", 12)).pack(pady=10)
-    Label(root, text="Apply custom font now, or wait until after you close Roblox?", wraplength=420).pack(pady=5)
+    def poll(self):
+        """Returns the answers given since the last call, without blocking."""
+        answers = []
+        while True:
+            try: choice, versions = self.answers.get_nowait()
+            except queue.Empty: return answers
+            self.awaiting.difference_update(versions)
+            answers.append((choice, versions))
 
-    button_frame = tk.Frame(root)
-    button_frame.pack(pady=15)
+    def _run(self):
+        try:
+            import tkinter as tk
+            root = tk.Tk()
+        except Exception as e: # No display (e.g. a service session): the monitor falls back to waiting for Roblox to close
+            log(f"Warning: Could not show the update dialog, updates will wait until Roblox is closed. {e}")
+            while True: self.answers.put(("later", self.requests.get()))
+        root.withdraw()
 
-    Button(button_frame, text="Update Now", width=12, command=lambda: on_choice("now")).pack(side="left", padx=5)
-    Button(button_frame, text="Update Later", width=12, command=lambda: on_choice("later")).pack(side="left", padx=5)
-    Button(button_frame, text="Skip This Version", width=15, command=lambda: on_choice("cancel")).pack(side="left", padx=5)
+        def pump():
+            offered = set()
+            while True:
+                try: offered |= self.requests.get_nowait()
+                except queue.Empty: break
+            if offered:
+                self.shown |= offered
+                if self.dialog is None: self._open(tk, root)
+                self.message.config(text=self._describe())
+            root.after(PROMPT_POLL_MS, pump)
 
-    root.protocol("WM_DELETE_WINDOW", lambda: on_choice("cancel"))
-    root.mainloop()
+        pump()
+        root.mainloop()
+
+    def _describe(self):
+        keys = sorted(self.shown, key=lambda key: key[1], reverse=True)
+        listed = "\n".join(version_label(root, version if len(version) <= 25 else f"{version[:25]}...") for root, version in keys[:PROMPT_LIST_LIMIT])
+        more = f"\n(+{len(keys) - PROMPT_LIST_LIMIT} more)" if len(keys) > PROMPT_LIST_LIMIT else ""
+        return f"Roblox update detected for {len(keys)} version(s):\n{listed}{more}"
+
+    def _answer(self, choice):
+        self.answers.put((choice, set(self.shown)))
+        self.dialog.destroy()
+        self.dialog, self.shown = None, set()
+
+    def _open(self, tk, root):
+        dialog = self.dialog = tk.Toplevel(root)
+        dialog.title("Roblox Update Detected")
+
+        window_height = 170 + 20 * min(len(self.shown), PROMPT_LIST_LIMIT + 1)
+        window_width = 440
+        screen_width = dialog.winfo_screenwidth()
+        screen_height = dialog.winfo_screenheight()
+        x_cordinate = int((screen_width/2) - (window_width/2))
+        y_cordinate = int((screen_height/2) - (window_height/2))
+        dialog.geometry(f"{window_width}x{window_height}+{x_cordinate}+{y_cordinate}")
 
-    return result["choice"]
+        dialog.resizable(False, False)
+        dialog.attributes("-topmost", True)
+
+        self.message = tk.Label(dialog, font=("Segoe UI", 12))
+        self.message.pack(pady=10)
+        tk.Label(dialog, text="Apply custom font now, or wait until after you close Roblox?", wraplength=420).pack(pady=5)
+
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(pady=15)
+
+        tk.Button(button_frame, text="Update Now", width=12, command=lambda: self._answer("now")).pack(side="left", padx=5)
+        tk.Button(button_frame, text="Update Later", width=12, command=lambda: self._answer("later")).pack(side="left", padx=5)
+        tk.Button(button_frame, text="Skip These Versions", width=17, command=lambda: self._answer("cancel")).pack(side="left", padx=5)
+
+        dialog.protocol("WM_DELETE_WINDOW", lambda: self._answer("cancel"))
+
+# --- Update Policy ---
+def load_policy(path=POLICY_FILE_PATH):
+    """Reads the policy file, falling back to DEFAULT_POLICY for anything missing or invalid."""
+    policy = dict(DEFAULT_POLICY)
+    if not os.path.isfile(path): return policy
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            policy.update(json.load(f))
+    except (OSError, ValueError) as e:
+        log(f"Warning: Could not read policy file, using defaults. {e}")
+        return dict(DEFAULT_POLICY)
+    if policy["update_policy"] not in UPDATE_POLICIES:
+        log(f"Warning: Unknown update_policy '{policy['update_policy']}' in policy file. Using 'ask'.")
+        policy["update_policy"] = "ask"
+    if isinstance(policy["roblox_roots"], str): policy["roblox_roots"] = [policy["roblox_roots"]]
+    return policy
+
+def decide_update(policy):
+    """Returns the policy's answer ("now", "later" or "cancel") for an update, or None if the user has to be asked."""
+    if policy["update_policy"] == "ask":
+        return None
+    return {"now": "now", "later": "later", "skip": "cancel"}[policy["update_policy"]]
 
 # --- Core Functions ---
 def get_source_font():
-    if not os.path.isdir(SOURCE_FOLDER_PATH):
+    if dir_index.snapshot(SOURCE_FOLDER_PATH) is None:
         try:
             os.makedirs(SOURCE_FOLDER_PATH)
             log(f"Source folder created at: {SOURCE_FOLDER_PATH}")
         except OSError: return None
     
     try:
-        files = [f for f in os.listdir(SOURCE_FOLDER_PATH) if os.path.isfile(os.path.join(SOURCE_FOLDER_PATH, f))]
+        files = dir_index.files(SOURCE_FOLDER_PATH)
         if len(files) == 1: return os.path.join(SOURCE_FOLDER_PATH, files[0])
     except Exception as e: log(f"ERROR: Could not access source folder: {e}")
     return None
 
-def get_roblox_versions():
-    if not os.path.isdir(ROBLOX_VERSIONS_PATH): return set()
-    return {d for d in os.listdir(ROBLOX_VERSIONS_PATH) if os.path.isdir(os.path.join(ROBLOX_VERSIONS_PATH, d))}
+def get_roblox_versions(root=None):
+    return set(dir_index.dirs(root or ROBLOX_VERSIONS_PATH))
+
+def needs_font_update(version, root=None):
+    """A version needs replacing if it has a fonts folder but no Fonts.old backup yet."""
+    entry = dir_index.version(root or ROBLOX_VERSIONS_PATH, version)
+    return entry.has_fonts and not entry.has_backup
+
+# --- Roblox Roots ---
+# Shared lab machines have a Roblox install in every user profile. One process can
+# manage all of them: each root gets its own watcher and state, while the directory
+# index, backup store, worker pool and update dialog are shared.
+def root_key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+def discover_roblox_roots():
+    """Returns the Roblox 'Versions' folders of every user profile on this machine, plus machine-wide installs."""
+    candidates = []
+    try:
+        with os.scandir(os.path.dirname(os.path.expanduser('~'))) as profiles: # C:\Users on Windows
+            candidates += [os.path.join(p.path, 'AppData', 'Local', 'Roblox', 'Versions') for p in profiles if p.is_dir()]
+    except OSError:
+        pass
+    for variable in ('ProgramFiles(x86)', 'ProgramFiles'):
+        if os.environ.get(variable): candidates.append(os.path.join(os.environ[variable], 'Roblox', 'Versions'))
+    return [c for c in candidates if os.path.isdir(c)]
+
+def resolve_roots(configured=(), discover=False):
+    """The configured roots (ROBLOX_VERSIONS_PATH if none), plus the discovered ones, without duplicates."""
+    roots = {}
+    for root in list(configured or [ROBLOX_VERSIONS_PATH]) + (discover_roblox_roots() if discover else []):
+        roots.setdefault(root_key(root), root)
+    return list(roots.values())
+
+class RootLock:
+    """An OS file lock on <Roblox>/font_manager.lock, held while this process manages that install.
+
+    With discover_roots every signed-in user's manager sees every profile; the lock
+    makes sure only one of them ever stages or recovers swaps in it. The OS drops
+    the lock when the process exits, so a crash never leaves a stale one.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.path = os.path.join(os.path.dirname(os.path.abspath(root)), ROOT_LOCK_NAME)
+        self.file = None
+        self.reported = None # Why acquire() last failed, once that has been logged
+
+    def acquire(self):
+        """Returns True if this process holds the lock, False if the root does not exist, another process holds it or it cannot be created."""
+        if self.file: return True
+        if not os.path.isdir(self.root): return False # Never creates folders for an install that is not there
+        try:
+            f = open(self.path, 'a+b')
+        except OSError:
+            return False
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self.file = f
+        return True
+
+def claim_roots(roots):
+    """Returns the roots this process could lock. Missing roots and those another manager holds are left out (logged once each)."""
+    claimed = []
+    for root in roots:
+        lock = root_locks.setdefault(root_key(root), RootLock(root))
+        if lock.acquire():
+            claimed.append(root)
+            continue
+        reason = "locked" if os.path.isdir(root) else "missing"
+        if lock.reported != reason:
+            lock.reported = reason
+            if reason == "missing": log(f"Skipping '{root}': the folder does not exist (yet).")
+            else: log(f"Skipping '{root_label(root)}': another font manager is already looking after it (or '{lock.path}' cannot be created).")
+    return claimed
 
-def restart_roblox(new_version_folder_path):
+def root_label(root):
+    """A short name for a root: the profile name for per-user installs, otherwise the path."""
+    parts = os.path.normpath(root).replace('\\', '/').split('/')
+    if len(parts) > 4 and [p.lower() for p in parts[-4:]] == ['appdata', 'local', 'roblox', 'versions']: return parts[-5]
+    return root
+
+def version_label(root, version):
+    """How a version is named in logs and in the update dialog; the root is only mentioned when there are several."""
+    return version if len(roblox_roots) <= 1 else f"{version} ({root_label(root)})"
+
+def folder_label(fonts_folder):
+    version_folder = os.path.dirname(os.path.dirname(fonts_folder))
+    return version_label(os.path.dirname(version_folder), os.path.basename(version_folder))
+
+def can_restart_roblox(root):
+    """Roblox is only relaunched for this user's own install: other profiles' players must not get a window as the wrong user."""
+    return len(roblox_roots) <= 1 or root_key(root).startswith(root_key(os.path.expanduser('~')) + os.sep)
+
+def restart_roblox(new_version_folder_path, tracker, root=None):
+    """Closes Roblox (only the processes running from `root`, if given) and relaunches it from the new version folder."""
     log("Attempting to restart Roblox...")
-    for proc in psutil.process_iter(['pid', 'name']):
-        if proc.info['name'] == "RobloxPlayerBeta.exe":
-            try:
-                psutil.Process(proc.info['pid']).terminate()
-                log(f"Closed Roblox process (PID: {proc.info['pid']}).")
-            except psutil.NoSuchProcess: pass
+    tracker.poll()
+    for pid in (tracker.pids() if root is None else tracker.pids_in(root, roblox_roots, exact=True)):
+        if terminate_process(pid):
+            log(f"Closed Roblox process (PID: {pid}).")
+        else:
+            log(f"Could not close Roblox process (PID: {pid}); it has exited or belongs to another user.")
     
     time.sleep(3)
     roblox_exe_path = os.path.join(new_version_folder_path, "RobloxPlayerBeta.exe")
     if os.path.exists(roblox_exe_path):
         try:
+            import subprocess
             subprocess.Popen([roblox_exe_path])
             log("Relaunching Roblox from the new version folder.")
         except Exception as e: log(f"Failed to relaunch Roblox: {e}")
     else: log(f"Error: RobloxPlayerBeta.exe not found in '{new_version_folder_path}'")
 
-def replace_fonts(target_fonts_folder, source_font):
-    log(f"--- Starting replacement for '{os.path.basename(os.path.dirname(os.path.dirname(target_fonts_folder)))}' ---")
+def log_deployment(result, deployer):
+    """Logs what font_engine.execute_folder() did for one folder and adds it to the metrics. Returns whether it succeeded."""
+    if not result["ok"]:
+        log(f"CRITICAL: Replacement failed. Error: {result['error']}")
+        return False
+    backup, swap = result["backup"], result["swap"]
+    metrics.count("backup_bytes_stored", backup["bytes"] - backup["deduplicated_bytes"])
+    for filename in result["kept"]: log(f"Kept original emoji font: {filename}")
+    if result["same"]: log(f"{len(result['same'])} font(s) already match the custom font and were left alone.")
+    if not swap["files"]:
+        log("No font files found in the target directory to replace.")
+        return True
+
+    log(f"Backed up {backup['files']} original font file(s) ({backup['new_blobs']} new, {backup['deduplicated_bytes'] // 1024} KB already in the backup store).")
+    metrics.count("files_touched", swap["files"])
+    metrics.count("bytes_copied", swap["bytes_written"])
+    log(f"Successfully replaced {swap['files']} file(s), swapped in within {swap['swap_seconds'] * 1000:.1f} ms. Deployment so far: {deployer.summary()}",
+        stage_ms=round(swap['stage_seconds'] * 1000, 3), swap_ms=round(swap['swap_seconds'] * 1000, 3))
+    return True
+
+def replace_fonts(target_fonts_folder, source_font, deployer=None):
+    log(f"--- Starting replacement for '{folder_label(target_fonts_folder)}' ---")
     try:
-        backup_folder_path = os.path.join(target_fonts_folder, "Fonts.old", datetime.now().strftime('%Y-%m-%d_%H-%M-%S'))
-        os.makedirs(backup_folder_path, exist_ok=True)
-        
-        font_ext = ('.ttf', '.otf')
-        
-        original_fonts = [f for f in os.listdir(target_fonts_folder) if os.path.isfile(os.path.join(target_fonts_folder, f)) and f.lower().endswith(font_ext)]
-        
-        if not original_fonts:
-            log("No font files found in the target directory to replace.")
-            return True
+        deployer = deployer or FontDeployer(source_font, DEPLOY_MODE)
+        plan = plan_deployment(source_font, [target_fonts_folder], hash_cache, dir_index, deployer.mode)
+        return log_deployment(execute_folder(plan["folders"][0], deployer, backup_stores, hash_cache), deployer)
+    except Exception as e:
+        log(f"CRITICAL: Replacement failed. Error: {e}")
+        return False
 
-        for filename in original_fonts:
-            shutil.move(os.path.join(target_fonts_folder, filename), os.path.join(backup_folder_path, filename))
-        log(f"Backed up {len(original_fonts)} original font file(s).")
+# --- Backup Retention ---
+def retention_folders():
+    """Returns {store folder: fonts folders} for every fonts folder that may hold backups: Roblox versions, registered and manually replaced folders."""
+    folders = [os.path.join(root, v, 'content', 'fonts') for root in roblox_roots for v in get_roblox_versions(root)]
+    try:
+        with open(HISTORY_FILE_PATH, 'r', encoding='utf-8') as f:
+            folders += [line.strip() for line in f if line.strip()]
+    except OSError:
+        pass
+    groups = {}
+    for folder in folders: groups.setdefault(store_root_for(folder), []).append(folder)
+    for store_root, group in groups.items():
+        group += backup_stores.for_folder(group[0]).registered_folders()
+        unique = {}
+        for folder in group: unique.setdefault(os.path.normcase(os.path.abspath(folder)), folder)
+        groups[store_root] = list(unique.values())
+    return groups
 
-        replaced_count = 0
-        for filename in original_fonts:
-            original_backup_path = os.path.join(backup_folder_path, filename)
-            new_file_path = os.path.join(target_fonts_folder, filename)
+def run_backup_retention(policy):
+    """Background thread: prunes backups by the policy's limits every RETENTION_INTERVAL_SECONDS."""
+    max_mb = policy.get("backup_max_mb")
+    while True:
+        try:
+            for folders in retention_folders().values(): # Each store is pruned on its own: the size limit applies per Roblox install
+                retention = BackupRetention(backup_stores.for_folder(folders[0]), folders, keep_last=policy["backup_keep_last"],
+                                            max_age_days=policy.get("backup_max_age_days"), max_bytes=max_mb * 1024 * 1024 if max_mb else None)
+                for _ in retention.steps(): time.sleep(RETENTION_STEP_PAUSE)
+                s = retention.stats
+                if s["backups_removed"] or s["blobs_removed"]:
+                    log(f"Backup cleanup in '{retention.store.root}': removed {s['backups_removed']} old backup(s) and {s['blobs_removed']} unused file(s), "
+                        f"reclaimed {s['bytes_reclaimed'] / 1024 / 1024:.1f} MB. Backups now use {s['bytes_total'] / 1024 / 1024:.1f} MB.", **s)
+                if s["folders_unreachable"]:
+                    log(f"Backup cleanup in '{retention.store.root}': {s['folders_unreachable']} backed-up folder(s) could not be reached, so no stored fonts were deleted.")
+        except Exception as e:
+            log(f"Warning: Backup cleanup failed: {e}")
+        time.sleep(RETENTION_INTERVAL_SECONDS)
 
-            if filename.lower().startswith('twemoji'):
-                shutil.copy2(original_backup_path, new_file_path)
-                log(f"Restored original emoji font: {filename}")
-            else:
-                shutil.copy2(source_font, new_file_path)
-                replaced_count += 1
-        
-        log(f"Successfully replaced {replaced_count} file(s).")
+def recover_interrupted_swap(root, version):
+    """Rolls a version's leftover staging folder forward or back (see font_deploy.recover). Returns True if it had one."""
+    fonts_folder = os.path.join(root, version, 'content', 'fonts')
+    snapshot = dir_index.snapshot(fonts_folder)
+    if snapshot is None or STAGING_FOLDER_NAME not in snapshot.dirs: return False
+    try:
+        action = recover_swap(fonts_folder)
+        log(f"Recovered an interrupted font swap in '{version_label(root, version)}': {action.replace('_', ' ')}.")
+    except OSError as e:
+        log(f"ERROR: Could not recover the interrupted font swap in '{version_label(root, version)}': {e}")
+    return True
+
+def recover_interrupted_swaps():
+    for root in roblox_roots:
+        for version in get_roblox_versions(root): recover_interrupted_swap(root, version)
+
+# --- Persistent Version State ---
+class VersionStateIndex:
+    """SQLite record of what has been done to each version folder, kept across restarts.
+
+    Status is one of "processed", "pending", "ignored" or "failed". Every write is its
+    own transaction, so a crash can lose at most the change being written. Rows are
+    keyed by root_key(), so one install given with another casing or a trailing
+    separator shares its rows.
+    """
+    STATUSES = ("processed", "pending", "ignored", "failed")
+
+    def __init__(self, path=STATE_DB_PATH, root=None):
+        self.path = path
+        self.root = root_key(root or ROBLOX_VERSIONS_PATH)
+        try:
+            self.conn = self._open()
+        except sqlite3.DatabaseError as e:
+            log(f"Warning: State index is unreadable ({e}). Starting a new one.")
+            for suffix in ("", "-wal", "-shm"): # SQLite would replay a stale WAL into the new database
+                try: os.replace(path + suffix, path + ".corrupt" + suffix)
+                except FileNotFoundError: pass
+            self.conn = self._open()
+        self._merge_root_aliases()
+
+    def _open(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS versions (
+                root TEXT NOT NULL,
+                version TEXT NOT NULL,
+                status TEXT NOT NULL,
+                source_hash TEXT,
+                fonts_mtime_ns INTEGER,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (root, version))""")
+            conn.execute("PRAGMA integrity_check").fetchone()
+        except sqlite3.DatabaseError:
+            conn.close() # Must be closed before the broken file can be moved aside on Windows
+            raise
+        return conn
+
+    def _merge_root_aliases(self):
+        """Moves rows written under another spelling of this root (older versions stored it as given) to root_key()."""
+        aliases = [row[0] for row in self.conn.execute("SELECT DISTINCT root FROM versions WHERE root != ?", (self.root,)) if root_key(row[0]) == self.root]
+        if not aliases: return
+        with self.conn:
+            for alias in aliases:
+                self.conn.execute("UPDATE OR IGNORE versions SET root = ? WHERE root = ?", (self.root, alias))
+                self.conn.execute("DELETE FROM versions WHERE root = ?", (alias,)) # Rows the key already had
+
+    def get(self, version):
+        """Returns the record for `version` as a dict, or None if it has never been seen."""
+        row = self.conn.execute("SELECT status, source_hash, fonts_mtime_ns, updated_at FROM versions WHERE root = ? AND version = ?", (self.root, version)).fetchone()
+        return dict(zip(("status", "source_hash", "fonts_mtime_ns", "updated_at"), row)) if row else None
+
+    def set(self, version, status, source_hash=None, fonts_mtime_ns=None):
+        if status not in self.STATUSES: raise ValueError(f"Unknown version status '{status}'")
+        with self.conn:
+            self.conn.execute("""INSERT INTO versions (root, version, status, source_hash, fonts_mtime_ns, updated_at) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (root, version) DO UPDATE SET status = excluded.status,
+                    source_hash = COALESCE(excluded.source_hash, versions.source_hash),
+                    fonts_mtime_ns = excluded.fonts_mtime_ns, updated_at = excluded.updated_at""",
+                (self.root, version, status, source_hash, fonts_mtime_ns, datetime.now().isoformat(timespec='seconds')))
+
+    def with_all(self):
+        return {row[0] for row in self.conn.execute("SELECT version FROM versions WHERE root = ?", (self.root,))}
+
+    def with_status(self, status):
+        return {row[0] for row in self.conn.execute("SELECT version FROM versions WHERE root = ? AND status = ?", (self.root, status))}
+
+    def is_unchanged(self, version, fonts_mtime_ns):
+        """True if `version` was processed or ignored and its fonts folder has not changed since."""
+        record = self.get(version)
+        return bool(record) and record["status"] in ("processed", "ignored") and record["fonts_mtime_ns"] == fonts_mtime_ns
+
+    def prune(self, existing_versions):
+        """Forgets versions whose folders Roblox has removed. Returns how many were dropped."""
+        gone = [(self.root, v) for v in self.with_all() if v not in existing_versions]
+        with self.conn:
+            self.conn.executemany("DELETE FROM versions WHERE root = ? AND version = ?", gone)
+        return len(gone)
+
+    def close(self):
+        self.conn.close()
+
+def get_fonts_mtime_ns(version, versions_path=None):
+    """The mtime of a version's fonts folder, which changes whenever a font or Fonts.old is added or removed."""
+    try:
+        return os.stat(os.path.join(versions_path or ROBLOX_VERSIONS_PATH, version, 'content', 'fonts')).st_mtime_ns
+    except OSError:
+        return None
+
+# --- Replacement Worker Pool ---
+class ReplacementPool:
+    """Runs replace_fonts() for version folders of one or more roots on a bounded thread pool.
+
+    submit() returns immediately so the monitor loop keeps cycling; finished jobs
+    are picked up with collect(). Jobs wait in a queue per root and are started
+    round-robin across roots, at most `per_root` at a time for any one root, so a
+    profile with many new versions cannot hold up the others.
+    """
+
+    def __init__(self, workers=REPLACEMENT_WORKERS, per_root=None):
+        self.workers = max(1, workers)
+        self.per_root = per_root # None: only `workers` limits the jobs of one root
+        self.executor = None # Started with the first job
+        self.jobs = {} # (root, version) -> Future, or None while it waits in its root's queue
+        self.queues = {} # root -> deque of (version, source_font, deployer); dict order is the round-robin order
+        self.started = {} # root -> jobs running
+        self.lock = threading.RLock() # Jobs are also started from worker threads, as earlier jobs finish
+
+    def active(self):
+        return bool(self.jobs)
+
+    def queued(self):
+        return sum(len(q) for q in self.queues.values())
+
+    def is_running(self, version, root=None):
+        """True while a job for `version` is queued or running."""
+        return (root or ROBLOX_VERSIONS_PATH, version) in self.jobs
+
+    def submit(self, version, source_font, deployer=None, root=None):
+        """Queues a replacement for `version` of `root`. Returns False if one is already queued or running for it."""
+        root = root or ROBLOX_VERSIONS_PATH
+        with self.lock:
+            if (root, version) in self.jobs: return False
+            self.jobs[(root, version)] = None
+            self.queues.setdefault(root, deque()).append((version, source_font, deployer))
+        self._dispatch()
         return True
-    except Exception as e:
-        log(f"CRITICAL: Replacement failed. Error: {e}")
+
+    def _dispatch(self):
+        """Starts queued jobs while workers are free, taking the next root in turn that is under its limit."""
+        with self.lock:
+            while sum(self.started.values()) < self.workers:
+                root = next((r for r, q in self.queues.items() if self.per_root is None or self.started.get(r, 0) < self.per_root), None)
+                if root is None: return
+                waiting = self.queues.pop(root)
+                version, source_font, deployer = waiting.popleft()
+                if waiting: self.queues[root] = waiting # Back of the line, so the next job comes from another root
+                if self.executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rfm-replace")
+                self.started[root] = self.started.get(root, 0) + 1
+                self.jobs[(root, version)] = self.executor.submit(self._run, root, version, source_font, deployer)
+
+    def _run(self, root, version, source_font, deployer):
+        started = time.monotonic()
+        try:
+            target_fonts_folder = os.path.join(root, version, 'content', 'fonts')
+            if not os.path.isdir(target_fonts_folder):
+                return {"root": root, "version": version, "ok": False, "seconds": 0.0, "error": "fonts folder not found"}
+            ok = replace_fonts(target_fonts_folder, source_font, deployer)
+            return {"root": root, "version": version, "ok": ok, "seconds": round(time.monotonic() - started, 3), "error": None if ok else "replacement failed"}
+        finally:
+            with self.lock:
+                self.started[root] -= 1
+            self._dispatch() # The next job is started before this one reports done, so wait_all() never sees a gap
+
+    def collect(self):
+        """Returns the result dicts of jobs that have finished since the last call."""
+        results = []
+        with self.lock:
+            finished = [(key, future) for key, future in self.jobs.items() if future is not None and future.done()]
+            for key, _ in finished: del self.jobs[key]
+        for (root, version), future in finished:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({"root": root, "version": version, "ok": False, "seconds": 0.0, "error": str(e)})
+        return results
+
+    def wait_all(self, timeout=None):
+        """Blocks until every queued job has finished and returns their results."""
+        from concurrent.futures import wait
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = []
+        while True:
+            with self.lock:
+                running = [f for f in self.jobs.values() if f is not None]
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if not running or (remaining is not None and remaining <= 0):
+                return results + self.collect()
+            wait(running, remaining)
+            results += self.collect()
+
+    def shutdown(self):
+        if self.executor: self.executor.shutdown(wait=True)
+
+# --- Process Probes ---
+# psutil is used when it is installed. Without it, Linux (including Roblox under
+# Wine) is read straight from /proc, and Windows from a Toolhelp32 snapshot.
+_toolhelp_names = {} # pid -> exe name from the last Windows snapshot
+
+def _proc_list_pids():
+    return [int(d) for d in os.listdir('/proc') if d.isdigit()]
+
+def _proc_start_time(pid):
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            return int(f.read().rsplit(b')', 1)[1].split()[19]) # Field 22, start time in clock ticks after boot
+    except (OSError, IndexError, ValueError):
+        return None
+
+def _proc_process_name(pid):
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            argv0 = f.read().split(b'\0', 1)[0]
+        if argv0: # Wine keeps the Windows path here, e.g. C:\...\RobloxPlayerBeta.exe
+            return os.fsdecode(argv0).replace('\\', '/').rsplit('/', 1)[-1]
+        with open(f'/proc/{pid}/comm', 'r', encoding='utf-8', errors='replace') as f:
+            return f.read().strip() # Kernel threads have no cmdline; comm is truncated to 15 chars
+    except OSError:
+        return None
+
+def _toolhelp_list_pids():
+    """Lists every process with one CreateToolhelp32Snapshot call, remembering their names."""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESSENTRY32W(ctypes.Structure):
+        _fields_ = [("dwSize", wintypes.DWORD), ("cntUsage", wintypes.DWORD), ("th32ProcessID", wintypes.DWORD),
+                    ("th32DefaultHeapID", ctypes.c_size_t), ("th32ModuleID", wintypes.DWORD), ("cntThreads", wintypes.DWORD),
+                    ("th32ParentProcessID", wintypes.DWORD), ("pcPriClassBase", ctypes.c_long), ("dwFlags", wintypes.DWORD),
+                    ("szExeFile", ctypes.c_wchar * 260)]
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    snapshot = kernel32.CreateToolhelp32Snapshot(0x2, 0) # TH32CS_SNAPPROCESS
+    if snapshot in (None, wintypes.HANDLE(-1).value):
+        raise OSError(ctypes.get_last_error(), "CreateToolhelp32Snapshot failed")
+    names = {}
+    try:
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+        ok = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+        while ok:
+            names[entry.th32ProcessID] = entry.szExeFile
+            ok = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+    finally:
+        kernel32.CloseHandle(snapshot)
+    _toolhelp_names.clear()
+    _toolhelp_names.update(names)
+    return list(names)
+
+def _proc_process_path(pid):
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            return os.fsdecode(f.read().split(b'\0', 1)[0]) or None # Under Wine this is the Windows path
+    except OSError:
+        return None
+
+def _win_process_path(pid):
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    handle = kernel32.OpenProcess(0x1000, False, pid) # PROCESS_QUERY_LIMITED_INFORMATION
+    if not handle: return None
+    try:
+        size = wintypes.DWORD(32768)
+        buffer = ctypes.create_unicode_buffer(size.value)
+        return buffer.value if kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)) else None
+    finally:
+        kernel32.CloseHandle(handle)
+
+def list_process_ids():
+    if psutil: return psutil.pids()
+    if os.name == 'nt': return _toolhelp_list_pids()
+    return _proc_list_pids()
+
+def get_process_stamp(pid):
+    """Returns something that changes when `pid` is reused (its start time), or None if it cannot be read."""
+    if psutil:
+        try:
+            return psutil.Process(pid).create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+    if os.name == 'nt': return _toolhelp_names.get(pid) # The snapshot has no start times, so the name stands in
+    return _proc_start_time(pid)
+
+def get_process_name(pid):
+    """Returns the executable name for `pid`, or None if it is gone or inaccessible."""
+    if psutil:
+        try:
+            return psutil.Process(pid).name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+    if os.name == 'nt': return _toolhelp_names.get(pid)
+    return _proc_process_name(pid)
+
+def get_process_path(pid):
+    """Returns the full executable path for `pid`, or None if it is gone or inaccessible (e.g. another user's process)."""
+    if psutil:
+        try:
+            return psutil.Process(pid).exe() or None
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+    if os.name == 'nt': return _win_process_path(pid)
+    return _proc_process_path(pid)
+
+def terminate_process(pid):
+    """Asks a process to exit. Returns False if it was already gone or this user may not end it."""
+    if psutil:
+        try:
+            psutil.Process(pid).terminate()
+            return True
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+    try:
+        os.kill(pid, signal.SIGTERM) # TerminateProcess on Windows
+        return True
+    except (ProcessLookupError, OSError):
         return False
 
+# --- Roblox Process Tracker ---
+class ProcessTracker:
+    """Caches the PIDs of Roblox processes so each cycle only looks up the names of PIDs it has not seen before.
+
+    Only tracked PIDs have their start stamp read each poll: a tracked PID whose
+    stamp changed was reused, so it counts as exited and is looked up again.
+    """
+
+    def __init__(self, process_name=ROBLOX_PROCESS_NAME, rescan_seconds=PROCESS_RESCAN_SECONDS, list_pids=None, get_name=None, get_path=None, get_stamp=None):
+        self.process_name = process_name
+        self.rescan_seconds = rescan_seconds
+        self.list_pids = list_pids or list_process_ids
+        self.get_name = get_name or get_process_name
+        self.get_path = get_path or get_process_path
+        self.get_stamp = get_stamp or get_process_stamp
+        self.tracked = set() # PIDs currently known to be Roblox
+        self.paths = {} # Tracked PID -> executable path, None if it could not be read
+        self.stamps = {} # Tracked PID -> start stamp when it was found
+        self.seen = set() # Every PID present at the last poll
+        self.last_full_scan = None
+
+    def pids(self):
+        return sorted(self.tracked)
+
+    @property
+    def running(self):
+        return bool(self.tracked)
+
+    def pids_in(self, root, roots, exact=False):
+        """Tracked PIDs running from `root`. A process that is not under any of `roots` (or whose path is unknown) counts for all of them.
+
+        That is the safe answer for "is Roblox running?". With `exact`, used before
+        closing processes, only PIDs known to run from `root` are returned, so an
+        unreadable (typically another user's) process is never closed.
+        """
+        prefixes = {r: root_key(r) + os.sep for r in roots}
+        pids = []
+        for pid in sorted(self.tracked):
+            path = self.paths.get(pid)
+            owners = [r for r, prefix in prefixes.items() if path and os.path.normcase(path).startswith(prefix)]
+            if root in owners or not (owners or exact): pids.append(pid)
+        return pids
+
+    def running_in(self, root, roots):
+        return bool(self.pids_in(root, roots))
+
+    def poll(self):
+        """Refreshes the tracked PIDs and returns (started, exited) lists of Roblox PIDs since the last poll."""
+        current = set(self.list_pids())
+        now = time.monotonic()
+        full_scan = self.last_full_scan is None or now - self.last_full_scan >= self.rescan_seconds
+        if full_scan: self.last_full_scan = now
+
+        # A tracked PID is alive while its stamp is unchanged; without a stamp its name is checked instead
+        exited = []
+        for pid in sorted(self.tracked):
+            if pid in current:
+                stamp, known = self.get_stamp(pid), self.stamps[pid]
+                if stamp is not None and known is not None:
+                    if stamp == known: continue
+                elif self.get_name(pid) == self.process_name: continue
+            exited.append(pid)
+        self.tracked.difference_update(exited)
+        for pid in exited:
+            self.paths.pop(pid, None)
+            self.stamps.pop(pid)
+
+        candidates = current if full_scan else (current - self.seen) | (current & set(exited)) # A reused PID may be Roblox again
+        started = sorted(pid for pid in candidates - self.tracked if self.get_name(pid) == self.process_name)
+        self.tracked.update(started)
+        for pid in started:
+            self.paths[pid] = self.get_path(pid)
+            self.stamps[pid] = self.get_stamp(pid)
+        self.seen = current
+        return started, exited
+
+# --- Version Folder Watcher ---
+class PollingBackend:
+    """Fallback change backend: re-lists the root with os.scandir and diffs the names."""
+    name = "poll"
+
+    def __init__(self, root, interval=POLL_INTERVAL_SECONDS):
+        self.root = root
+        self.interval = interval
+        self.known = self._list()
+
+    def _list(self):
+        try:
+            with os.scandir(self.root) as entries:
+                return {e.name for e in entries if e.is_dir()}
+        except OSError:
+            return set()
+
+    def _diff(self):
+        current = self._list()
+        changed = current ^ self.known
+        self.known = current
+        return changed
+
+    def wait(self, timeout):
+        """Blocks for up to `timeout` seconds and returns the names of entries that changed."""
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = self._diff()
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+class InotifyBackend:
+    """Linux backend: reads IN_CREATE/IN_MOVED_TO/IN_DELETE events for the root folder."""
+    name = "inotify"
+    WATCH_MASK = 0x100 | 0x200 | 0x40 | 0x80 | 0x2 # IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_MODIFY
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, root):
+        import ctypes, ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.root = root
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(root), self.WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {root}")
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not ready: return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed, offset = set(), 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            _, _, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].split(b'\0', 1)[0]
+            offset += length
+            if name: changed.add(os.fsdecode(name))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class WindowsChangeBackend(PollingBackend):
+    """Windows backend: sleeps on FindFirstChangeNotificationW and only re-lists the root once signalled."""
+    name = "win32"
+    WAIT_OBJECT_0 = 0
+    INVALID_HANDLE_VALUE = -1
+
+    def __init__(self, root):
+        import ctypes
+        self.kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        self.kernel32.FindFirstChangeNotificationW.restype = ctypes.c_void_p
+        handle = self.kernel32.FindFirstChangeNotificationW(root, False, 0x2) # FILE_NOTIFY_CHANGE_DIR_NAME
+        if handle is None or ctypes.c_void_p(handle).value == ctypes.c_void_p(self.INVALID_HANDLE_VALUE).value:
+            raise OSError(ctypes.get_last_error(), f"FindFirstChangeNotificationW failed for {root}")
+        self.handle = ctypes.c_void_p(handle)
+        super().__init__(root)
+
+    def wait(self, timeout):
+        result = self.kernel32.WaitForSingleObject(self.handle, int(max(timeout, 0) * 1000))
+        if result != self.WAIT_OBJECT_0: return set()
+        self.kernel32.FindNextChangeNotification(self.handle)
+        return self._diff()
+
+    def close(self):
+        self.kernel32.FindCloseChangeNotification(self.handle)
+
+def open_change_backend(root):
+    """Returns the best change-notification backend for this platform, falling back to polling."""
+    native = InotifyBackend if sys.platform.startswith('linux') else WindowsChangeBackend if os.name == 'nt' else None
+    if native and os.path.isdir(root):
+        try:
+            return native(root)
+        except (OSError, AttributeError) as e:
+            log(f"Native folder watcher unavailable ({e}). Falling back to polling.")
+    return PollingBackend(root)
+
+class VersionWatcher:
+    """Reports new version folders under `root` once they have stopped changing for `debounce` seconds."""
+
+    def __init__(self, root=None, debounce=VERSION_DEBOUNCE_SECONDS, backend=None):
+        self.root = root or ROBLOX_VERSIONS_PATH
+        self.debounce = debounce
+        self.backend = backend or open_change_backend(self.root)
+        self.pending = {} # version -> (signature, time the signature was last seen changing)
+
+    def _signature(self, version):
+        """Directory mtimes along the fonts path; these move whenever the updater adds or removes entries."""
+        path = os.path.join(self.root, version)
+        signature = []
+        for folder in (path, os.path.join(path, 'content'), os.path.join(path, 'content', 'fonts')):
+            try: signature.append(os.stat(folder).st_mtime_ns)
+            except OSError: signature.append(None)
+        return tuple(signature)
+
+    def _settled(self):
+        now, ready = time.monotonic(), set()
+        for version, (signature, since) in list(self.pending.items()):
+            current = self._signature(version)
+            if current != signature:
+                self.pending[version] = (current, now)
+            elif now - since >= self.debounce:
+                ready.add(version)
+                del self.pending[version]
+        return ready
+
+    def wait(self, timeout):
+        """Blocks for up to `timeout` seconds and returns the set of version folders that appeared and settled."""
+        deadline = time.monotonic() + timeout
+        while True:
+            ready = self._settled()
+            remaining = deadline - time.monotonic()
+            if ready or remaining <= 0:
+                return ready
+            step = min(remaining, self.debounce / 2) if self.pending else remaining
+            for name in self.backend.wait(step):
+                if os.path.isdir(os.path.join(self.root, name)):
+                    self.pending[name] = (self._signature(name), time.monotonic())
+                else:
+                    self.pending.pop(name, None)
+
+    def close(self):
+        self.backend.close()
+
+class WatcherGroup:
+    """Watches several roots from one process: a VersionWatcher per root, each on its own thread, reporting through one queue."""
+    SLICE_SECONDS = 60 # How long each watcher thread blocks per wait() call
+
+    def __init__(self, roots=(), debounce=VERSION_DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self.watchers = {}
+        self.changes = queue.Queue() # (root, set of settled version folders)
+        for root in roots: self.add(root)
+
+    def add(self, root):
+        watcher = self.watchers[root] = VersionWatcher(root, self.debounce)
+        threading.Thread(target=self._run, args=(watcher,), name=f"rfm-watch-{len(self.watchers)}", daemon=True).start()
+        return watcher
+
+    def _run(self, watcher):
+        while True:
+            try:
+                ready = watcher.wait(self.SLICE_SECONDS)
+            except Exception as e:
+                log(f"Warning: Watching '{watcher.root}' failed, retrying in a minute. {e}")
+                time.sleep(60)
+                continue
+            if ready: self.changes.put((watcher.root, ready))
+
+    def wait(self, timeout):
+        """Blocks for up to `timeout` seconds and returns {root: version folders that appeared and settled}."""
+        changes = {}
+        try:
+            root, ready = self.changes.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            return changes
+        while True:
+            changes.setdefault(root, set()).update(ready)
+            try: root, ready = self.changes.get_nowait()
+            except queue.Empty: return changes
+
 # --- Main Monitoring Loop ---
-def main():
+def apply_to_all_versions(workers=REPLACEMENT_WORKERS, dry_run=False):
+    """One-shot run: replaces fonts in every version that needs it (or only logs the plan), then returns a process exit code.
+
+    0 = everything succeeded (or nothing to do), 1 = at least one version failed, 2 = no source font.
+    main() turns 0 into 3 when a requested root was skipped.
+    """
+    source_font = get_source_font()
+    if not source_font:
+        log("Cannot apply fonts: no source font is ready.")
+        return 2
+    # Taken one root at a time in turn, so with several roots every one of them makes progress from the start
+    per_root = [[(root, v) for v in sorted(get_roblox_versions(root)) if needs_font_update(v, root)] for root in roblox_roots]
+    targets = [key for batch in itertools.zip_longest(*per_root) for key in batch if key]
+    if not targets:
+        log("Every version already has the custom font. Nothing to do.")
+        return 0
+
+    # One plan for every version, executed in one batch: the font is written once per volume and hardlinked into the rest
+    plan = plan_deployment(source_font, [os.path.join(root, v, 'content', 'fonts') for root, v in targets], hash_cache, dir_index, DEPLOY_MODE)
+    if dry_run:
+        log(f"Dry run, nothing was changed. Applying '{os.path.basename(source_font)}' would do:\n{describe_deployment(plan)}")
+        return 0
+    log(f"Applying '{os.path.basename(source_font)}' to {len(targets)} version(s) on {workers} worker(s). Plan:\n{describe_deployment(plan)}")
+    deployer = FontDeployer(source_font, DEPLOY_MODE)
+    states = {root: VersionStateIndex(root=root) for root in dict.fromkeys(root for root, _ in targets)}
+    def report(result):
+        log(f"--- Finished '{folder_label(result['folder'])}' in {result['seconds']}s ---")
+        log_deployment(result, deployer)
+    results = execute_plan(plan, deployer, backup_stores, hash_cache, workers, on_result=report)
+    for (root, version), result in zip(targets, results):
+        states[root].set(version, "processed" if result["ok"] else "failed", plan["sha256"], get_fonts_mtime_ns(version, root))
+    for state in states.values(): state.close()
+
+    failed = [version_label(root, version) for (root, version), result in zip(targets, results) if not result["ok"]]
+    log(f"Applied to {len(results) - len(failed)} version(s). {deployer.summary()}" + (f" Failed: {', '.join(failed)}" if failed else ""))
+    return 1 if failed else 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Roblox Font Manager: keeps your custom font applied to new Roblox versions.")
+    parser.add_argument("--policy", choices=UPDATE_POLICIES, help="Override the update_policy from font_manager_policy.json for this run")
+    parser.add_argument("--headless", action="store_true", help="Never show a dialog; an 'ask' policy is treated as 'later'")
+    parser.add_argument("--apply-all", action="store_true", help="Apply the font to every version that needs it, then exit (0 = ok, 1 = a version failed, 2 = no source font, 3 = an install was skipped: missing, or managed by another running manager)")
+    parser.add_argument("--dry-run", action="store_true", help="With --apply-all: only log what would be replaced and how many bytes it takes")
+    parser.add_argument("--workers", type=int, default=REPLACEMENT_WORKERS, help="Version folders processed at the same time")
+    parser.add_argument("--root", action="append", metavar="PATH", help="A Roblox 'Versions' folder to manage; repeat for several (default: roblox_roots from the policy file, or this user's)")
+    parser.add_argument("--discover-roots", action="store_true", help="Also manage the Roblox installs of every user profile on this machine")
+    parser.add_argument("--metrics", nargs="?", const=METRICS_FILE_PATH, metavar="PATH", help="Write per-cycle timings and counters as JSON lines (default file: font_manager_metrics.jsonl)")
+    parser.add_argument("--status", metavar="ADDRESS", help="Serve the latest metrics on a local endpoint: 127.0.0.1:PORT (HTTP) or unix:/path/to.sock")
+    parser.add_argument("--profile-cycles", type=int, default=0, metavar="N", help="Run cProfile and tracemalloc over the first N cycles and write a summary next to the metrics file")
+    parser.add_argument("--log-json", action="store_true", help="Write font_manager.log as JSON lines instead of plain text")
+    return parser.parse_args(argv)
+
+class RootMonitor:
+    """What the monitor loop keeps between cycles for one Roblox root."""
+
+    def __init__(self, root):
+        self.root = root
+        self.state = VersionStateIndex(root=root)
+        dropped = self.state.prune(get_roblox_versions(root))
+        self.pending = self.state.with_status("pending") # Versions to replace once Roblox is closed
+        self.ignored = set(self.pending) # Prevents asking for the same version repeatedly in one session
+        self.source_hashes = {} # version -> hash of the source font queued for it
+        self.restart_after = None # Version whose replacement job relaunches Roblox when it finishes
+        self.was_running = bool(self.pending) # Restored pending updates are processed on the first idle cycle
+        self.needs_scan = True
+        self.last_full_scan = 0
+        log(f"State index loaded{self.where}: {len(self.state.with_all())} known version(s), {len(self.pending)} pending" + (f", {dropped} removed version(s) forgotten." if dropped else "."))
+
+    @property
+    def where(self):
+        return "" if len(roblox_roots) <= 1 else f" for '{root_label(self.root)}'"
+
+def main(argv=None):
+    global metrics, roblox_roots
+    args = parse_args(argv)
+    policy = load_policy()
+    log_sink.json_lines = args.log_json or bool(policy["log_json_lines"]) # The sink is created at import, before the policy is read
+    discover = args.discover_roots or policy["discover_roots"]
+    requested = resolve_roots(args.root or policy["roblox_roots"], discover)
+    roblox_roots = claim_roots(requested)
+    waiting = [root for root in requested if root not in roblox_roots] # Missing or held by another manager; retried while monitoring
+    if not roblox_roots and (args.apply_all or not (discover or any(not os.path.isdir(root) for root in waiting))):
+        log("No Roblox install is left to manage: " + ("they are missing or looked after by another font manager." if args.apply_all else "another font manager already looks after them.") + " Exiting.")
+        log_sink.close()
+        return 3
+    recover_interrupted_swaps()
+    if args.apply_all:
+        code = apply_to_all_versions(args.workers, args.dry_run)
+        if waiting and code == 0:
+            log(f"Skipped {len(waiting)} Roblox install(s): {', '.join(waiting)}.")
+            code = 3
+        log_sink.close()
+        return code
+
+    if args.policy: policy["update_policy"] = args.policy
+    if args.headless and policy["update_policy"] == "ask": policy["update_policy"] = "later"
+
     log("--- Automatic Font Manager Started ---")
     log("Monitoring for Roblox process and new versions...")
+    log(f"Update policy: '{policy['update_policy']}'" + ("" if policy["restart_roblox"] else " (Roblox is not restarted after updates)"))
+    if len(roblox_roots) > 1:
+        log(f"Managing {len(roblox_roots)} Roblox installs: {', '.join(root_label(root) for root in roblox_roots)}.")
     
-    is_roblox_running_previously = False
+    threading.Thread(target=run_backup_retention, args=(policy,), name="rfm-retention", daemon=True).start()
+    if args.metrics or args.status or args.profile_cycles:
+        try:
+            metrics = CycleMetrics(args.metrics, args.status, args.profile_cycles, os.path.join(SCRIPT_DIR, "font_manager_profile.txt"))
+        except (OSError, ValueError) as e:
+            log(f"Cannot enable metrics: {e}")
+            log_sink.close()
+            return 1
+        log("Metrics enabled" + (f": writing to '{args.metrics}'" if args.metrics else "") + (f", status on {args.status}" if args.status else "")
+            + (f", profiling the first {args.profile_cycles} cycle(s)" if args.profile_cycles else "") + ".")
+    watchers = WatcherGroup(roblox_roots)
+    for watcher in watchers.watchers.values():
+        log(f"Watching '{watcher.root}' for new versions ({watcher.backend.name} backend).")
+    tracker = ProcessTracker()
+    pool = ReplacementPool(args.workers, policy["max_jobs_per_root"] if len(roblox_roots) > 1 else None)
+    monitors = {root: RootMonitor(root) for root in roblox_roots}
+    last_discovery = time.monotonic()
+    prompt = UpdatePrompt()
+
+    def apply_choice(choice, keys, chooser):
+        """Acts on an answer for (root, version) `keys`, whether it came from the policy or from the dialog."""
+        keys = sorted(keys, key=lambda key: key[1], reverse=True)
+        log(f"{chooser} selected: '{choice.upper()}' for version '{version_label(*keys[0])}'" + (f" and {len(keys) - 1} other(s)" if len(keys) > 1 else ""))
+        by_root, deployer = {}, None
+        for root, version in keys: by_root.setdefault(root, []).append(version)
+        for root, versions in by_root.items():
+            monitor = monitors[root]
+            monitor.ignored.update(versions)
+            root_choice = choice
+            if choice == "later" and not tracker.running_in(root, roblox_roots): # Answered after Roblox was already closed
+                log(f"Roblox is no longer running{monitor.where}, so the update is applied now.")
+                root_choice = "now"
+
+            if root_choice == "now":
+                source_font = get_source_font()
+                if not source_font: # Kept as pending, so the update is not lost for this root or the ones after it
+                    log(f"Cannot apply the update{monitor.where}: no source font is ready anymore. It waits until Roblox is closed.")
+                    monitor.pending.update(versions)
+                    for version in versions: monitor.state.set(version, "pending")
+                    continue
+                deployer = deployer or FontDeployer(source_font, DEPLOY_MODE) # Shared so every version reuses the same on-disk copy
+                source_hash = hash_cache.digest(source_font)[0]
+                for version in versions:
+                    if pool.submit(version, source_font, deployer, root): monitor.source_hashes[version] = source_hash
+                monitor.restart_after = versions[0] if policy["restart_roblox"] and tracker.running_in(root, roblox_roots) and can_restart_roblox(root) else None
+                log(f"Queued {len(versions)} version(s){monitor.where} for replacement on {pool.workers} worker(s).")
+
+            elif root_choice == "later":
+                monitor.pending.update(versions)
+                for version in versions: monitor.state.set(version, "pending")
+                log(f"{len(versions)} version(s){monitor.where} added to the queue for later.")
+
+            elif root_choice == "cancel":
+                for version in versions: monitor.state.set(version, "ignored", fonts_mtime_ns=get_fonts_mtime_ns(version, root))
 
     while True:
         try:
-            is_roblox_running_now = any(p.name() == "RobloxPlayerBeta.exe" for p in psutil.process_iter(['name']))
+            metrics.begin_cycle()
+            results = pool.collect()
+            for result in results:
+                metrics.count("replacements")
+                metrics.count("replacement_seconds", result["seconds"])
+                root, version = result["root"], result["version"]
+                monitor = monitors[root]
+                status = "finished" if result["ok"] else f"FAILED ({result['error']})"
+                log(f"Replacement job for '{version_label(root, version)}' {status} in {result['seconds']}s.")
+                monitor.state.set(version, "processed" if result["ok"] else "failed", monitor.source_hashes.pop(version, None), get_fonts_mtime_ns(version, root))
+                if version == monitor.restart_after:
+                    monitor.restart_after = None
+                    if result["ok"]: restart_roblox(os.path.join(root, version), tracker, root)
+            if results and not pool.active():
+                log("All queued replacements completed.")
+            metrics.lap("collect")
+
+            started, exited = tracker.poll()
+            for pid in started: log(f"Roblox process started (PID: {pid}).")
+            for pid in exited: log(f"Roblox process exited (PID: {pid}).")
+            is_roblox_running_now = tracker.running
+            metrics.lap("process_detection")
+
+            for choice, keys in prompt.poll():
+                apply_choice(choice, keys, "User")
+            metrics.lap("dialog")
 
-            if is_roblox_running_now:
-                if not is_roblox_running_previously:
-                    log("RobloxPlayerBeta.exe detected. Actively monitoring for updates.")
-                is_roblox_running_previously = True
+            found = claim_roots(waiting) if waiting else [] # e.g. Roblox installed after the manager started
+            if discover and time.monotonic() - last_discovery >= ROOT_DISCOVERY_SECONDS:
+                last_discovery = time.monotonic()
+                known = {root_key(root) for root in roblox_roots + waiting}
+                found += claim_roots([root for root in discover_roblox_roots() if root_key(root) not in known])
+            for root in found:
+                if root in waiting: waiting.remove(root)
+                roblox_roots.append(root)
+                log(f"Found a Roblox install for '{root_label(root)}'. Watching '{watchers.add(root).root}'.")
+                monitors[root] = RootMonitor(root)
+                if len(roblox_roots) > 1: pool.per_root = policy["max_jobs_per_root"]
 
-                updatable_versions = []
-                current_versions = get_roblox_versions()
+            updatable_versions = [] # (root, version) of every root, so one decision covers them all
+            for root, monitor in monitors.items():
+                if tracker.running_in(root, roblox_roots):
+                    if not monitor.was_running:
+                        log(f"RobloxPlayerBeta.exe detected{monitor.where}. Actively monitoring for updates.")
+                        monitor.needs_scan = True
+                    monitor.was_running = True
 
-                for version in current_versions:
-                    if version in session_ignored_versions:
-                        continue 
+                    if time.monotonic() - monitor.last_full_scan >= FULL_RESCAN_SECONDS:
+                        monitor.needs_scan = True
+                    current_versions = get_roblox_versions(root) if monitor.needs_scan else set()
+                    if monitor.needs_scan: monitor.last_full_scan = time.monotonic()
+                    monitor.needs_scan = False
+                    metrics.count("versions_scanned", len(current_versions))
 
-                    fonts_folder = os.path.join(ROBLOX_VERSIONS_PATH, version, 'content', 'fonts')
-                    backup_folder = os.path.join(fonts_folder, 'Fonts.old')
+                    for version in current_versions:
+                        if pool.is_running(version, root):
+                            continue
+                        # A swap left half-done (by a crash, or a failure it could not clean up) is finished first;
+                        # a rolled-back version has no backup any more, so it is offered again below
+                        recover_interrupted_swap(root, version)
+                        if version in monitor.ignored:
+                            continue 
+                        entry = dir_index.version(root, version)
+                        if monitor.state.is_unchanged(version, entry.fonts_mtime_ns):
+                            continue
 
-                    if os.path.isdir(fonts_folder) and not os.path.isdir(backup_folder):
-                        updatable_versions.append(version)
+                        if entry.has_fonts and not entry.has_backup:
+                            updatable_versions.append((root, version))
+                        elif entry.has_backup: # Already replaced, e.g. before the state index existed
+                            monitor.state.set(version, "processed", fonts_mtime_ns=entry.fonts_mtime_ns)
+
+                else: # Roblox not running from this root
+                    if monitor.was_running:
+                        log(f"Roblox process no longer running{monitor.where}. Checking for pending updates...")
+                        if monitor.pending:
+                            source_font = get_source_font()
+                            if not source_font:
+                                 log("Cannot process pending updates: no source font is ready.")
+                            else:
+                                log(f"Processing {len(monitor.pending)} pending update(s){monitor.where} on {pool.workers} worker(s).")
+                                deployer = FontDeployer(source_font, DEPLOY_MODE)
+                                source_hash = hash_cache.digest(source_font)[0]
+                                for version in sorted(monitor.pending):
+                                    if pool.submit(version, source_font, deployer, root): monitor.source_hashes[version] = source_hash
+                                monitor.pending.clear()
+                    monitor.was_running = False
+            metrics.lap("version_scan")
                 
-                if updatable_versions:
-                    log(f"Detected {len(updatable_versions)} version(s) needing font update.")
-                    source_font = get_source_font()
-
-                    if not source_font:
-                        log("Found updatable version(s), but no source font is ready. Skipping.")
-                        for v in updatable_versions: session_ignored_versions.add(v)
-                    else:
-                        log(f"Source font is ready: {os.path.basename(source_font)}")
-                        
-                        latest_version_to_update = sorted(updatable_versions, reverse=True)[0]
-                        
-                        user_choice = ask_update_preference(latest_version_to_update)
-                        log(f"User selected: '{user_choice.upper()}' for version '{latest_version_to_update}'")
-                        
-                        target_fonts_folder = os.path.join(ROBLOX_VERSIONS_PATH, latest_version_to_update, 'content', 'fonts')
-                        
-                        if user_choice == "now":
-                            if replace_fonts(target_fonts_folder, source_font):
-                                version_folder = os.path.dirname(os.path.dirname(target_fonts_folder))
-                                restart_roblox(version_folder)
-                            session_ignored_versions.add(latest_version_to_update)
-                        
-                        elif user_choice == "later":
-                            pending_updates.add(latest_version_to_update)
-                            session_ignored_versions.add(latest_version_to_update)
-                            log(f"'{latest_version_to_update}' added to the queue for later.")
-                        
-                        elif user_choice == "cancel":
-                            session_ignored_versions.add(latest_version_to_update)
-
-            else: # Roblox not running
-                if is_roblox_running_previously:
-                    log("Roblox process no longer running. Checking for pending updates...")
-                    if pending_updates:
-                        source_font = get_source_font()
-                        if not source_font:
-                             log("Cannot process pending updates: no source font is ready.")
-                        else:
-                            log(f"Processing {len(pending_updates)} pending update(s).")
-                            for version in list(pending_updates):
-                                target_fonts_folder = os.path.join(ROBLOX_VERSIONS_PATH, version, 'content', 'fonts')
-                                if os.path.isdir(target_fonts_folder):
-                                    replace_fonts(target_fonts_folder, source_font)
-                                pending_updates.remove(version)
-                            log("All pending updates completed.")
-                is_roblox_running_previously = False
+            if updatable_versions:
+                log(f"Detected {len(updatable_versions)} version(s) needing font update.")
+                source_font = get_source_font()
+
+                if not source_font:
+                    log("Found updatable version(s), but no source font is ready. Skipping.")
+                    for root, version in updatable_versions: monitors[root].ignored.add(version)
+                else:
+                    log(f"Source font is ready: {os.path.basename(source_font)}")
+                    choice = decide_update(policy)
+                    if choice:
+                        apply_choice(choice, updatable_versions, "Policy")
+                    else: # The dialog answers through prompt.poll() on a later cycle; monitoring carries on meanwhile
+                        prompt.offer(updatable_versions)
+                        for root, version in updatable_versions: monitors[root].ignored.add(version)
+                        log(f"Asking the user about {len(updatable_versions)} version(s)" + (f" ({len(prompt.awaiting)} awaiting an answer in total)." if len(prompt.awaiting) > len(updatable_versions) else "."))
             
-            time.sleep(CHECK_INTERVAL_SECONDS)
+            metrics.lap("queue")
+            new_versions = watchers.wait(JOB_POLL_SECONDS if pool.active() or prompt.awaiting else CHECK_INTERVAL_SECONDS)
+            metrics.lap("wait")
+            for root, versions in new_versions.items():
+                log(f"New version folder(s) detected{monitors[root].where}: {', '.join(sorted(versions))}")
+                monitors[root].needs_scan = True
+            metrics.end_cycle(idle_phases=("wait",), roblox_running=is_roblox_running_now, jobs_active=pool.active(), jobs_queued=pool.queued(),
+                              awaiting_answer=len(prompt.awaiting), roots=len(monitors))
         except Exception as e:
             log(f"An unexpected error occurred in the main loop: {e}")
             time.sleep(60)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 '''
 
 MANAGER_HUB_CODE = r'''
@@ -256,20 +1320,26 @@ import os
 import shutil
 import sys
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
-from datetime import datetime
-import subprocess
-import time
+from tkinter import ttk, messagebox
+
+# The manual tool's dialogs and backends (font_store, font_deploy, font_index) are
+# imported inside the methods that use them, so the hub window opens without them.
+from font_log import LogSink
 
 # User requested token for scripts
 # mvy9amhku0l3b2kq0cemzduy6czqm8
 
+# --- LOGGING ---
+# Manual tool messages are also kept on disk, through the same buffered writer the auto manager uses
+LOG_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), "manager.log")
+log_sink = LogSink(LOG_FILE_PATH)
+
 # --- UNINSTALLER LOGIC ---
 def run_uninstall(parent_window):
     """Contains all logic for uninstalling the application."""
     
     install_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-    if not messagebox.askyesno("Confirm Uninstall", f"This will terminate the font manager and permanently delete all of its files from:\n\n{install_dir}\n\nAre you sure you want to continue?", parent=parent_window):
+    if not messagebox.askyesno("Confirm Uninstall", f"This will terminate the font manager and permanently delete all of its files from:\n\n{install_dir}\n\nFont backups are kept next to your Roblox install, so reinstalling can still restore them. Are you sure you want to continue?", parent=parent_window):
         return
 
     try:
@@ -310,6 +1380,7 @@ def run_uninstall(parent_window):
             f.write(f'del "%~f0"\n')
 
         # Launch the batch script completely detached from the Python process
+        import subprocess
         subprocess.Popen(f'"{deleter_bat_path}"', shell=True, creationflags=subprocess.DETACHED_PROCESS | subprocess.CREATE_NO_WINDOW)
         
         # The batch script will kill this process, so we just let it run
@@ -335,6 +1406,11 @@ class FontManagerApp:
         self.source_folder_path = os.path.join(self.script_dir, self.source_folder_name)
         self.history_filename = "font_manager_history.txt"
         self.history_filepath = os.path.join(self.script_dir, self.history_filename)
+        from font_store import BackupStores, HashCache
+        from font_index import DirectoryIndex
+        self.backup_store = BackupStores() # Blobs live next to each Roblox install, so uninstalling never loses the originals
+        self.hash_cache = HashCache(os.path.join(self.script_dir, "font_hash_cache.json"))
+        self.dir_index = DirectoryIndex() # The source folder is checked every 5 seconds; this makes that one stat() when nothing changed
         
         self.last_source_status = None
         self.current_source_file = None
@@ -366,6 +1442,7 @@ class FontManagerApp:
 
         log_frame = ttk.LabelFrame(self.win, text="Log", padding=(10, 5))
         log_frame.pack(side="bottom", fill="x", expand=False, padx=15, pady=(0, 15))
+        from tkinter import scrolledtext
         self.log_widget = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, state='disabled', height=8)
         self.log_widget.pack(fill="x", expand=True)
 
@@ -399,7 +1476,8 @@ class FontManagerApp:
         target_entry.pack(side='left', fill='x', expand=True)
         ttk.Button(target_frame, text="Browse...", command=self.select_target_folder).pack(side='right', padx=(5,0))
 
-        ttk.Button(frame, text="Perform Replacement", command=self.run_replacement_process).pack(fill='x', ipady=8, pady=10)
+        self.replace_button = ttk.Button(frame, text="Perform Replacement", command=self.run_replacement_process)
+        self.replace_button.pack(fill='x', ipady=8, pady=10)
         ttk.Button(frame, text="« Back to Menu", command=lambda: self.show_frame(self.main_menu_frame)).pack(fill='x', ipady=2)
 
     def _create_undo_frame(self):
@@ -447,6 +1525,7 @@ class FontManagerApp:
         self.scan_for_backups()
     
     def log(self, message):
+        if message.strip(): log_sink.write(message.strip())
         self.log_widget.config(state='normal')
         self.log_widget.insert(tk.END, message + "\n")
         self.log_widget.see(tk.END)
@@ -454,16 +1533,17 @@ class FontManagerApp:
         self.win.update_idletasks()
 
     def monitor_source_folder(self):
-        if not os.path.isdir(self.source_folder_path):
+        snapshot = self.dir_index.snapshot(self.source_folder_path)
+        if snapshot is None:
             try:
                 os.makedirs(self.source_folder_path)
                 self.log(f"Source folder created at: {self.source_folder_path}")
             except Exception: pass
-        try:
-            source_files = [f for f in os.listdir(self.source_folder_path) if os.path.isfile(os.path.join(self.source_folder_path, f))]
-        except Exception:
+            snapshot = self.dir_index.snapshot(self.source_folder_path)
+        if snapshot is None:
             self.source_file_path_var.set("CRITICAL: Cannot access source folder.")
             return
+        source_files = sorted(snapshot.files)
 
         status, msg = "", ""
         if len(source_files) == 0: status, self.current_source_file, msg = "waiting", None, "Waiting for a font file..."
@@ -484,6 +1564,7 @@ class FontManagerApp:
             self.win.after(5000, self.monitor_source_folder)
     
     def select_target_folder(self):
+        from tkinter import filedialog
         folder_selected = filedialog.askdirectory(title="Select the folder", parent=self.win)
         if folder_selected:
             if os.path.basename(folder_selected) == "Fonts.old":
@@ -494,6 +1575,7 @@ class FontManagerApp:
             self.scan_for_backups()
     
     def scan_for_backups(self):
+        from font_store import list_backups, read_manifest
         self.backup_menu.config(state='disabled')
         self.undo_button.config(state='disabled')
         self.selected_backup_var.set("No backups found")
@@ -501,7 +1583,7 @@ class FontManagerApp:
         base_backup_dir = os.path.join(self.target_folder_path_var.get(), "Fonts.old")
         if os.path.isdir(base_backup_dir):
             try:
-                backups = sorted([d for d in os.listdir(base_backup_dir) if os.path.isdir(os.path.join(base_backup_dir, d))], reverse=True)
+                backups = list_backups(self.target_folder_path_var.get(), self.dir_index)
                 if backups:
                     menu = self.backup_menu["menu"]
                     menu.delete(0, "end")
@@ -510,7 +1592,8 @@ class FontManagerApp:
                     self.selected_backup_var.set(backups[0])
                     self.backup_menu.config(state='normal')
                     self.undo_button.config(state='normal')
-                    self.log(f"Found {len(backups)} backup session(s).")
+                    legacy = sum(1 for b in backups if read_manifest(os.path.join(base_backup_dir, b)) is None)
+                    self.log(f"Found {len(backups)} backup session(s)." + (f" {legacy} are old-style copies." if legacy else ""))
                     return
             except Exception as e: self.log(f"Error scanning backups: {e}")
         self.log("No valid backups found in 'Fonts.old' folder.")
@@ -519,48 +1602,65 @@ class FontManagerApp:
         if not self.current_source_file: messagebox.showerror("Error", "Source font is not ready.", parent=self.win); return
         target_folder = self.target_folder_path_var.get()
         if not target_folder or not os.path.isdir(target_folder): messagebox.showerror("Error", "Please select a valid target folder first.", parent=self.win); return
-        if not messagebox.askyesno("Confirmation", f"This will replace all fonts in:\n'{target_folder}'\n\nwith:\n'{os.path.basename(self.current_source_file)}'\n\nA new backup will be created. Proceed?", parent=self.win): self.log("Replacement cancelled."); return
-        
         self.log("\n--- Starting manual replacement ---")
         try:
-            backup_folder_path = os.path.join(target_folder, "Fonts.old", datetime.now().strftime('%Y-%m-%d_%H-%M-%S'))
-            os.makedirs(backup_folder_path, exist_ok=True)
-            self.log(f"Creating backup: {os.path.basename(backup_folder_path)}")
-            
-            font_ext = ('.ttf', '.otf')
-            replaced_count = 0
-            for filename in os.listdir(target_folder):
-                file_path = os.path.join(target_folder, filename)
-                if os.path.isfile(file_path) and filename.lower().endswith(font_ext):
-                    if not filename.lower().startswith('twemoji'):
-                        shutil.move(file_path, os.path.join(backup_folder_path, filename))
-                        shutil.copy2(self.current_source_file, file_path)
-                        replaced_count += 1
-            
-            self.log(f"Successfully replaced {replaced_count} file(s).")
-            messagebox.showinfo("Success", f"Process finished! Replaced {replaced_count} file(s).", parent=self.win)
-            self._save_to_history(target_folder)
-            self.scan_for_backups()
-        except Exception as e: messagebox.showerror("Error", f"Replacement failed: {e}", parent=self.win); self.log(f"ERROR: {e}")
+            from font_engine import describe_deployment, plan_deployment
+            plan = plan_deployment(self.current_source_file, [target_folder], self.hash_cache, self.dir_index) # Dry run: nothing is written yet
+            self.hash_cache.save()
+        except Exception as e: messagebox.showerror("Error", f"Could not read the target folder: {e}", parent=self.win); self.log(f"ERROR: {e}"); return
+        if plan["folders"][0]["error"]: messagebox.showerror("Error", f"Could not read the target folder: {plan['folders'][0]['error']}", parent=self.win); self.log(f"ERROR: {plan['folders'][0]['error']}"); return
+        if not plan["totals"]["replace"]:
+            messagebox.showinfo("Information", f"Every font in this folder already is '{os.path.basename(self.current_source_file)}' (emoji fonts are always kept). Nothing to replace.", parent=self.win); self.log("Nothing to replace."); return
+        if not messagebox.askyesno("Confirmation", f"This will replace fonts in:\n'{target_folder}'\n\nwith:\n'{os.path.basename(self.current_source_file)}'\n\n{describe_deployment(plan)}\n\nA new backup will be created. Proceed?", parent=self.win): self.log("Replacement cancelled."); return
+
+        # The copying runs on a worker thread; the window stays responsive and picks up the result when it is done
+        import threading
+        from font_engine import execute_plan
+        outcome = {}
+        worker = threading.Thread(target=lambda: outcome.update(results=execute_plan(plan, store=self.backup_store, hash_cache=self.hash_cache)), daemon=True)
+        self.replace_button.config(state='disabled')
+        worker.start()
+        self._finish_replacement(worker, outcome, target_folder)
+
+    def _finish_replacement(self, worker, outcome, target_folder):
+        if worker.is_alive():
+            self.win.after(100, self._finish_replacement, worker, outcome, target_folder)
+            return
+        self.replace_button.config(state='normal')
+        self.hash_cache.save()
+        result = outcome["results"][0] if outcome.get("results") else {"ok": False, "error": "the replacement stopped unexpectedly"}
+        if not result["ok"]: messagebox.showerror("Error", f"Replacement failed: {result['error']}", parent=self.win); self.log(f"ERROR: {result['error']}"); return
+
+        self.log(f"Created backup: {os.path.basename(result['backup_path'])} ({result['backup']['new_blobs']} new file(s) stored)")
+        if result["same"]: self.log(f"{len(result['same'])} font(s) already matched and were left alone.")
+        replaced_count = result["swap"]["files"]
+        self.log(f"Successfully replaced {replaced_count} file(s), swapped in within {result['swap']['swap_seconds'] * 1000:.1f} ms.")
+        messagebox.showinfo("Success", f"Process finished! Replaced {replaced_count} file(s).", parent=self.win)
+        self._save_to_history(target_folder)
+        self.scan_for_backups()
 
     def run_undo_process(self):
         target_folder, selected_backup = self.target_folder_path_var.get(), self.selected_backup_var.get()
         if not target_folder or selected_backup in ["No Target Selected", "No backups found"]: messagebox.showerror("Error", "Select a valid target and backup session.", parent=self.win); return
         backup_path = os.path.join(target_folder, "Fonts.old", selected_backup)
         if not os.path.isdir(backup_path): messagebox.showerror("Error", f"Backup folder not found:\n{backup_path}", parent=self.win); return
-        if not messagebox.askyesno("Confirmation", f"This will restore all files from:\n'{selected_backup}'\n\nThis will overwrite current fonts in the target folder. Proceed?", parent=self.win): self.log("Undo cancelled."); return
         
         self.log(f"\n--- Starting Undo from '{selected_backup}' ---")
         try:
-            files_to_restore = [f for f in os.listdir(backup_path) if os.path.isfile(os.path.join(backup_path, f))]
-            if not files_to_restore: messagebox.showinfo("Information", "Backup folder is empty.", parent=self.win); self.log("Backup is empty."); return
+            from font_store import describe_plan, plan_restore
+            plan = plan_restore(backup_path, target_folder, self.hash_cache) # Dry run: nothing is written yet
+            self.hash_cache.save()
+            if not plan: messagebox.showinfo("Information", "Backup folder is empty.", parent=self.win); self.log("Backup is empty."); return
+            if all(item["action"] == "same" for item in plan):
+                messagebox.showinfo("Information", "Every file in this backup already matches the target folder. Nothing to restore.", parent=self.win); self.log("Nothing to restore."); return
+            if not messagebox.askyesno("Confirmation", f"Restoring '{selected_backup}' will change these fonts:\n\n{describe_plan(plan)}\n\nProceed?", parent=self.win): self.log("Undo cancelled."); return
             
-            for filename in files_to_restore: shutil.move(os.path.join(backup_path, filename), os.path.join(target_folder, filename))
-            self.log(f"Restored {len(files_to_restore)} file(s).")
-            messagebox.showinfo("Success", f"Successfully restored {len(files_to_restore)} file(s).", parent=self.win)
+            restored = self.backup_store.restore_backup(backup_path, target_folder, plan, keep=True)
+            self.log(f"Restored {len(restored)} file(s).")
+            messagebox.showinfo("Success", f"Successfully restored {len(restored)} file(s).", parent=self.win)
             
-            if messagebox.askyesno("Cleanup", f"Remove the now-empty backup folder '{selected_backup}'?", parent=self.win):
-                os.rmdir(backup_path); self.log(f"Removed empty backup: {selected_backup}")
+            if messagebox.askyesno("Cleanup", f"Remove the backup '{selected_backup}'?", parent=self.win):
+                shutil.rmtree(backup_path); self.log(f"Removed backup: {selected_backup}")
             self.scan_for_backups()
         except Exception as e: messagebox.showerror("Error", f"Undo failed: {e}", parent=self.win); self.log(f"ERROR: {e}")
 
@@ -592,56 +1692,1970 @@ if __name__ == "__main__":
     root.mainloop()
 '''
 
-# --- INSTALLER APP ---
+FONT_STORE_CODE = r'''
+import os
+import sys
+import json
+import hashlib
+import shutil
+import tempfile
+import zlib
+import time
+import threading
+from datetime import datetime
 
-class FontChooserApp:
-    def __init__(self, parent, install_dir):
-        self.win = tk.Toplevel(parent)
-        self.win.title("Step 2: Choose Your Font")
-        self.win.geometry("600x650")
-        self.win.resizable(False, False)
-        self.win.protocol("WM_DELETE_WINDOW", self._on_close)
+# User requested token for scripts
+# mvy9amhku0l3b2kq0cemzduy6czqm8
 
-        self.install_dir = install_dir
-        self.fonts_dir = os.path.join(install_dir, "Fonts")
-        self.target_dir = os.path.join(install_dir, "PLACE YOUR CUSTOM FONT HERE")
-        self.loaded_fonts = []
+# --- Configuration ---
+STORE_FOLDER_NAME = "FontBackups" # Next to the Roblox 'Versions' folder, never in the install folder (see store_root_for)
+DEFAULT_COMPRESSION = None # None, "zlib" or "lzma"
+BACKUP_FOLDER_NAME = "Fonts.old"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+FONT_EXTENSIONS = ('.ttf', '.otf')
+COMPRESSION_SUFFIXES = {None: "", "zlib": ".zz", "lzma": ".xz"}
+REGISTRY_NAME = "folders.txt" # Every fonts folder that has ever been backed up into this store
+BLOB_GRACE_SECONDS = 3600 # Blobs used this recently are never collected: their backup may not have a manifest yet
 
-        self._setup_ui()
-        self.win.after(100, self._load_and_display_fonts) # Load after window is shown
+# --- Helpers ---
+def hash_file(path):
+    """Returns (sha256 hex digest, size) of the file at `path`, read in chunks."""
+    digest, size = hashlib.sha256(), 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
 
-    def _setup_ui(self):
-        header_frame = ttk.Frame(self.win, padding=10)
-        header_frame.pack(fill='x')
-        ttk.Label(header_frame, text="Select a Font", font=("Segoe UI", 16, "bold")).pack()
-        info_text = "Preset fonts are listed below. To add more, place them in the 'Fonts' folder\n" \
-                    "inside the installation directory, then click 'Refresh List'."
-        ttk.Label(header_frame, text=info_text, wraplength=580, justify='center').pack(pady=5)
-        
-        ttk.Separator(self.win, orient='horizontal').pack(fill='x', padx=10, pady=5)
+def _compressor(compression):
+    if compression == "zlib": return zlib.compressobj(6)
+    if compression == "lzma":
+        import lzma # Only stores that opted into lzma pay for loading it
+        return lzma.LZMACompressor()
+    return None
 
-        main_frame = ttk.Frame(self.win)
-        main_frame.pack(fill='both', expand=True)
+def _decompressor(compression):
+    if compression == "zlib": return zlib.decompressobj()
+    if compression == "lzma":
+        import lzma
+        return lzma.LZMADecompressor()
+    return None
 
-        self.canvas = tk.Canvas(main_frame)
-        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas, padding=10)
+def _write_atomic(path, chunks):
+    """Writes `chunks` to a temp file next to `path`, then renames it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks: f.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
 
-        self.scrollable_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-        
-        self.canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+def _read_chunks(path):
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(CHUNK_SIZE), b'')
 
-        footer_frame = ttk.Frame(self.win, padding=10)
-        footer_frame.pack(fill='x', side='bottom')
+def store_root_for(fonts_folder):
+    """Where the blobs of `fonts_folder`'s backups are kept, so they always stay with the manifests that use them.
 
-        self.status_label = ttk.Label(footer_frame, text="Ready.")
-        self.status_label.pack(side='left', anchor='w')
+    Roblox fonts folders (<Roblox>/Versions/<version>/content/fonts) share a store in
+    <Roblox>/FontBackups; any other folder keeps its own in Fonts.old/.fontbackups.
+    Uninstalling the manager therefore never takes the original fonts with it.
+    """
+    fonts_folder = os.path.abspath(fonts_folder)
+    content = os.path.dirname(fonts_folder)
+    if os.path.basename(fonts_folder).lower() == 'fonts' and os.path.basename(content).lower() == 'content':
+        return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(content))), STORE_FOLDER_NAME)
+    return os.path.join(fonts_folder, BACKUP_FOLDER_NAME, "." + STORE_FOLDER_NAME.lower())
 
-        button_container = ttk.Frame(footer_frame)
+# --- Backup Store ---
+class BackupStore:
+    """Hash-addressed blob store shared by the Fonts.old backups of one Roblox install.
+
+    Each backup is a Fonts.old/<timestamp> folder holding only a manifest that maps
+    file names to blobs, so a font that is identical across Roblox versions and
+    replacement runs is stored once.
+    """
+
+    def __init__(self, root, compression=DEFAULT_COMPRESSION):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown compression '{compression}'. Use one of: {', '.join(str(c) for c in COMPRESSION_SUFFIXES)}")
+        self.root = root
+        self.blobs_dir = os.path.join(root, "blobs")
+        self.compression = compression
+        self.registry_lock = threading.Lock()
+        self.registered = None
+        self.blob_lock = threading.Lock() # Orders put()'s reuse of a blob against retention removing it
+
+    # --- Blobs ---
+    def blob_path(self, digest, compression=None):
+        return os.path.join(self.blobs_dir, digest[:2], digest + COMPRESSION_SUFFIXES[compression])
+
+    def find_blob(self, digest):
+        """Returns (path, compression) of the stored blob for `digest`, or (None, None)."""
+        for compression in COMPRESSION_SUFFIXES:
+            path = self.blob_path(digest, compression)
+            if os.path.isfile(path): return path, compression
+        return None, None
+
+    def put(self, path, hash_cache=None):
+        """Adds the file at `path` and returns (digest, size, added); `added` is False if the content was already stored."""
+        digest, size = hash_cache.digest(path) if hash_cache else hash_file(path)
+        with self.blob_lock:
+            existing = self.find_blob(digest)[0]
+            if existing is not None:
+                try: os.utime(existing) # Marks it as in use, so retention leaves it alone until the manifest is written
+                except OSError: pass
+                return digest, size, False
+        blob_path = self.blob_path(digest, self.compression)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        compressor = _compressor(self.compression)
+        if compressor:
+            chunks = (compressor.compress(chunk) for chunk in _read_chunks(path))
+            _write_atomic(blob_path, _with_tail(chunks, compressor.flush))
+        else:
+            _write_atomic(blob_path, _read_chunks(path))
+        return digest, size, True
+
+    def restore(self, digest, dest_path, mtime=None):
+        """Writes the blob for `digest` to `dest_path` atomically, verifying its hash on the way."""
+        blob_path, compression = self.find_blob(digest)
+        if blob_path is None:
+            raise FileNotFoundError(f"Backup blob {digest[:12]} is missing from {self.blobs_dir}")
+        decompressor = _decompressor(compression)
+        check = hashlib.sha256()
+
+        def chunks():
+            for chunk in _read_chunks(blob_path):
+                data = decompressor.decompress(chunk) if decompressor else chunk
+                check.update(data)
+                yield data
+            if check.hexdigest() != digest:
+                raise IOError(f"Backup blob {digest[:12]} is corrupt (hash mismatch)")
+
+        _write_atomic(dest_path, chunks())
+        if mtime is not None: os.utime(dest_path, (mtime, mtime))
+
+    # --- Backups ---
+    def create_backup(self, fonts_folder, filenames, hash_cache=None, backup_path=None):
+        """Stores `filenames` from `fonts_folder` and writes a new Fonts.old/<timestamp> manifest. Returns (backup path, stats).
+
+        `backup_path` (from new_backup_path()) lets a caller record where the backup
+        goes before it exists. An existing folder is never reused.
+        """
+        backup_path = backup_path or new_backup_path(fonts_folder)
+        os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+        os.mkdir(backup_path)
+        self.register_folder(fonts_folder)
+        files, stats = {}, {"files": 0, "bytes": 0, "new_blobs": 0, "deduplicated_bytes": 0}
+        for filename in filenames:
+            file_path = os.path.join(fonts_folder, filename)
+            digest, size, added = self.put(file_path, hash_cache)
+            files[filename] = {"sha256": digest, "size": size, "mtime": os.path.getmtime(file_path)}
+            stats["files"] += 1
+            stats["bytes"] += size
+            if added: stats["new_blobs"] += 1
+            else: stats["deduplicated_bytes"] += size
+        write_manifest(backup_path, files)
+        return backup_path, stats
+
+    def restore_backup(self, backup_path, target_folder, plan=None, keep=False, hash_cache=None):
+        """Restores the files of a backup that differ from `target_folder` and returns their names.
+
+        `plan` is the result of plan_restore() (computed if not given); files it marks
+        "same" are left alone. Manifest backups keep their blobs, so the backup stays
+        usable. Legacy backups (plain file copies) are moved back, or copied with keep=True.
+        """
+        if plan is None: plan = plan_restore(backup_path, target_folder, hash_cache)
+        manifest = read_manifest(backup_path)
+        restored = []
+        for item in plan:
+            if item["action"] == "same": continue
+            filename = item["file"]
+            dest_path = os.path.join(target_folder, filename)
+            if manifest is not None:
+                entry = manifest["files"][filename]
+                self.restore(entry["sha256"], dest_path, entry.get("mtime"))
+            elif keep:
+                _write_atomic(dest_path, _read_chunks(os.path.join(backup_path, filename)))
+                shutil.copystat(os.path.join(backup_path, filename), dest_path)
+            else:
+                shutil.move(os.path.join(backup_path, filename), dest_path)
+            restored.append(filename)
+        return restored
+
+    def restore_many(self, jobs, workers=4, dry_run=False, keep=True, hash_cache=None):
+        """Plans (and unless `dry_run`, applies) several (backup_path, target_folder) restores at once.
+
+        Returns {target_folder: plan} with a "restored" flag on every item that was written.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        hash_cache = hash_cache or HashCache()
+        def run(job):
+            backup_path, target_folder = job
+            plan = plan_restore(backup_path, target_folder, hash_cache)
+            restored = set() if dry_run else set(self.restore_backup(backup_path, target_folder, plan, keep))
+            return target_folder, [dict(item, restored=item["file"] in restored) for item in plan]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            return dict(executor.map(run, jobs))
+
+    # --- Folder Registry ---
+    def _load_registry(self):
+        if self.registered is None:
+            try:
+                with open(os.path.join(self.root, REGISTRY_NAME), 'r', encoding='utf-8') as f:
+                    self.registered = [line.strip() for line in f if line.strip()]
+            except OSError:
+                self.registered = []
+        return self.registered
+
+    def register_folder(self, fonts_folder):
+        """Remembers that `fonts_folder` holds backups using this store, so retention can find them."""
+        fonts_folder = os.path.abspath(fonts_folder)
+        with self.registry_lock:
+            if fonts_folder in self._load_registry(): return
+            self.registered.append(fonts_folder)
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, REGISTRY_NAME), 'a', encoding='utf-8') as f: f.write(fonts_folder + "\n")
+
+    def registered_folders(self, reload=False):
+        """Returns the registered folders, dropping from the registry only those known to be gone (see _is_gone).
+
+        A folder that cannot be reached right now is still returned: its backups may
+        use blobs, and retention must not collect them. With `reload` the registry is
+        read again, picking up folders other processes registered.
+        """
+        with self.registry_lock:
+            if reload: self.registered = None
+            folders = self._load_registry()
+            alive = [f for f in folders if os.path.isdir(f) or not _is_gone(f)]
+            if len(alive) != len(folders):
+                self.registered = alive
+                try: _write_atomic(os.path.join(self.root, REGISTRY_NAME), ["".join(f + "\n" for f in alive).encode('utf-8')])
+                except OSError: pass
+            return list(alive)
+
+    def migrate_backup(self, backup_path):
+        """Converts a legacy backup of plain copies into blobs plus a manifest. Returns the bytes freed."""
+        manifest = read_manifest(backup_path)
+        if manifest is None:
+            filenames = [f for f in os.listdir(backup_path) if os.path.isfile(os.path.join(backup_path, f))]
+            files = {}
+            for filename in filenames:
+                file_path = os.path.join(backup_path, filename)
+                digest, size, _ = self.put(file_path)
+                files[filename] = {"sha256": digest, "size": size, "mtime": os.path.getmtime(file_path)}
+            write_manifest(backup_path, files) # Written before deleting anything, so a crash here loses nothing
+            manifest = read_manifest(backup_path)
+        freed = 0
+        for filename in manifest["files"]:
+            file_path = os.path.join(backup_path, filename)
+            if os.path.isfile(file_path):
+                freed += os.path.getsize(file_path)
+                os.remove(file_path)
+        return freed
+
+    def migrate_fonts_folder(self, fonts_folder):
+        """Migrates every legacy backup under `fonts_folder`/Fonts.old. Returns (backups migrated, bytes freed)."""
+        migrated, freed = 0, 0
+        base = os.path.join(fonts_folder, BACKUP_FOLDER_NAME)
+        for name in list_backups(fonts_folder):
+            backup_path = os.path.join(base, name)
+            if read_manifest(backup_path) is None or _has_files(backup_path, exclude=MANIFEST_NAME):
+                freed += self.migrate_backup(backup_path)
+                migrated += 1
+        return migrated, freed
+
+    def migrate_versions(self, versions_path):
+        """Migrates the legacy backups of every Roblox version under `versions_path`."""
+        migrated, freed = 0, 0
+        if not os.path.isdir(versions_path): return migrated, freed
+        for version in os.listdir(versions_path):
+            fonts_folder = os.path.join(versions_path, version, 'content', 'fonts')
+            if os.path.isdir(os.path.join(fonts_folder, BACKUP_FOLDER_NAME)):
+                count, size = self.migrate_fonts_folder(fonts_folder)
+                migrated += count
+                freed += size
+        return migrated, freed
+
+class BackupStores:
+    """Opens the BackupStore of each fonts folder (see store_root_for), one instance per store folder.
+
+    Has create_backup() and restore_backup() like a single store, so it can be passed
+    wherever one is expected.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.stores = {} # store folder -> BackupStore
+        self.lock = threading.Lock()
+
+    def for_folder(self, fonts_folder):
+        root = store_root_for(fonts_folder)
+        with self.lock:
+            if root not in self.stores: self.stores[root] = BackupStore(root, self.compression)
+            return self.stores[root]
+
+    def create_backup(self, fonts_folder, filenames, hash_cache=None, backup_path=None):
+        return self.for_folder(fonts_folder).create_backup(fonts_folder, filenames, hash_cache, backup_path)
+
+    def restore_backup(self, backup_path, target_folder, plan=None, keep=False, hash_cache=None):
+        fonts_folder = os.path.dirname(os.path.dirname(os.path.abspath(backup_path))) # The blobs are in the store of the folder the backup was made in
+        return self.for_folder(fonts_folder).restore_backup(backup_path, target_folder, plan, keep, hash_cache)
+
+def new_backup_path(fonts_folder):
+    """Returns an unused Fonts.old/<timestamp> path in `fonts_folder`, without creating it."""
+    base = os.path.join(fonts_folder, BACKUP_FOLDER_NAME)
+    stamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    for n in range(1, 100): # Two backups in the same second get _02, _03...: still unique, and still sorted oldest to newest
+        path = os.path.join(base, stamp if n == 1 else f"{stamp}_{n:02d}")
+        if not os.path.lexists(path): return path
+    raise FileExistsError(f"Too many backups made at {stamp} in {base}")
+
+def _with_tail(chunks, tail):
+    yield from chunks
+    yield tail()
+
+def _is_gone(path):
+    """True only if `path` is known not to exist: its nearest existing parent can be listed and has no such entry.
+
+    A folder on a drive that is not connected, or in a profile this user may not
+    read, is unreachable rather than gone.
+    """
+    path = os.path.abspath(path)
+    while True:
+        parent = os.path.dirname(path)
+        if parent == path: return False # Not even the drive is there
+        try:
+            names = os.listdir(parent)
+        except FileNotFoundError:
+            path = parent
+            continue
+        except OSError:
+            return False
+        return os.path.normcase(os.path.basename(path)) not in {os.path.normcase(name) for name in names}
+
+def _has_files(folder, exclude=None):
+    try:
+        return any(e.is_file() and e.name != exclude for e in os.scandir(folder))
+    except OSError:
+        return False
+
+# --- Retention ---
+def _folder_bytes(folder):
+    try:
+        return sum(e.stat().st_size for e in os.scandir(folder) if e.is_file())
+    except OSError:
+        return 0
+
+class BackupRetention:
+    """Removes old backups and the blobs nothing refers to any more, a little at a time.
+
+    In every fonts folder the newest and the oldest backup are always kept: the
+    newest marks the folder as processed, and the oldest is the only one holding the
+    original Roblox fonts (later backups hold whatever font was deployed before).
+    The backups in between go once there are more than `keep_last` in total or they
+    are older than `max_age_days`. If the store is still over `max_bytes`, the oldest
+    remaining in-between backups go next. Finally blobs that no manifest uses, such
+    as those of Roblox versions that have been deleted, are collected; none are while
+    any folder is unreachable, since its manifests cannot be read. Backups written
+    while retention runs are read again before collecting, and each blob is re-checked
+    against the grace period right before it is removed. steps() yields between
+    folders and blob batches so a caller can pace it.
+    """
+
+    def __init__(self, store, fonts_folders, keep_last=3, max_age_days=None, max_bytes=None, grace_seconds=BLOB_GRACE_SECONDS):
+        self.store = store
+        self.fonts_folders = list(fonts_folders)
+        self.keep_last = max(1, keep_last)
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.grace_seconds = grace_seconds
+        self.stats = {"backups_removed": 0, "blobs_removed": 0, "bytes_reclaimed": 0, "bytes_total": 0, "folders_unreachable": 0}
+
+    def run(self):
+        for _ in self.steps(): pass
+        return self.stats
+
+    def _remove_backup(self, path, legacy_bytes):
+        shutil.rmtree(path, ignore_errors=True)
+        self.stats["backups_removed"] += 1
+        self.stats["bytes_reclaimed"] += legacy_bytes
+
+    def _scan_blobs(self):
+        """Returns {digest: (path, size, mtime)} for every blob in the store."""
+        blobs = {}
+        try:
+            shards = [e.path for e in os.scandir(self.store.blobs_dir) if e.is_dir()]
+        except OSError:
+            return blobs
+        for shard in shards:
+            for entry in os.scandir(shard):
+                digest = entry.name.split('.', 1)[0]
+                if len(digest) == 64 and entry.is_file(): # Skips leftover .tmp files from interrupted writes
+                    st = entry.stat()
+                    blobs[digest] = (entry.path, st.st_size, st.st_mtime)
+        return blobs
+
+    def _refs_since_scan(self, scanned):
+        """Digests used by the backups whose manifest the scan did not read, in every folder registered by now."""
+        digests = []
+        for folder in set(map(os.path.abspath, self.fonts_folders)) | set(self.store.registered_folders(reload=True)):
+            for name in list_backups(folder):
+                path = os.path.join(folder, BACKUP_FOLDER_NAME, name)
+                if path in scanned: continue
+                manifest = read_manifest(path)
+                if manifest: digests += [entry["sha256"] for entry in manifest["files"].values()]
+        return digests
+
+    def steps(self):
+        now = time.time()
+        refs, older, legacy_total = {}, [], 0 # older: (mtime, path, digests, legacy bytes) of kept in-between backups
+        scanned = set() # Backups whose manifest was read
+        for folder in self.fonts_folders:
+            if not os.path.isdir(folder) and not _is_gone(folder):
+                self.stats["folders_unreachable"] += 1
+            names = list_backups(folder)
+            for index, name in enumerate(names):
+                path = os.path.join(folder, BACKUP_FOLDER_NAME, name)
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    continue
+                manifest = read_manifest(path)
+                if manifest: scanned.add(os.path.abspath(path))
+                digests = [entry["sha256"] for entry in manifest["files"].values()] if manifest else []
+                legacy = 0 if manifest else _folder_bytes(path)
+                too_old = self.max_age_days is not None and now - mtime > self.max_age_days * 86400
+                protected = index == 0 or index == len(names) - 1 # Newest and oldest
+                if not protected and (index >= self.keep_last - 1 or too_old):
+                    self._remove_backup(path, legacy)
+                    continue
+                for digest in digests: refs[digest] = refs.get(digest, 0) + 1
+                legacy_total += legacy
+                if not protected: older.append((mtime, path, digests, legacy))
+            yield
+
+        blobs = self._scan_blobs()
+        unreachable = self.stats["folders_unreachable"]
+        collectable = lambda digest: not unreachable and refs.get(digest, 0) == 0 and now - blobs[digest][2] > self.grace_seconds
+        total = legacy_total + sum(size for digest, (_, size, _) in blobs.items() if not collectable(digest))
+        yield
+
+        if self.max_bytes is not None:
+            for mtime, path, digests, legacy in sorted(older):
+                if total <= self.max_bytes: break
+                self._remove_backup(path, legacy)
+                total -= legacy
+                for digest in digests:
+                    refs[digest] -= 1
+                    if digest in blobs and collectable(digest): total -= blobs[digest][1]
+            yield
+
+        for digest in self._refs_since_scan(scanned): # e.g. a new Roblox version that ships the same fonts as a removed one
+            refs[digest] = refs.get(digest, 0) + 1
+        for count, digest in enumerate(list(blobs), 1):
+            if collectable(digest):
+                path, size, _ = blobs[digest]
+                with self.store.blob_lock:
+                    try:
+                        if time.time() - os.stat(path).st_mtime > self.grace_seconds: # put() may have reused it since the scan
+                            os.remove(path)
+                            self.stats["blobs_removed"] += 1
+                            self.stats["bytes_reclaimed"] += size
+                    except OSError:
+                        pass
+            if count % 50 == 0: yield
+        self.stats["bytes_total"] = total
+
+# --- Restore Planning ---
+class HashCache:
+    """sha256 digests of files, reused while a file's size and mtime are unchanged. Optionally kept on disk."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        if path:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = {k: tuple(v) for k, v in json.load(f).items()}
+            except (OSError, ValueError, AttributeError, TypeError):
+                pass
+
+    def digest(self, path):
+        """Returns (sha256 hex digest, size) of `path`, hashing it only if it changed since last time."""
+        st = os.stat(path)
+        with self.lock:
+            cached = self.entries.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2], st.st_size
+        digest, size = hash_file(path)
+        with self.lock:
+            self.entries[path] = (st.st_size, st.st_mtime_ns, digest)
+            self.dirty = True
+        return digest, size
+
+    def save(self):
+        if not (self.path and self.dirty): return
+        with self.lock:
+            data = json.dumps(self.entries).encode('utf-8')
+            self.dirty = False
+        try:
+            _write_atomic(self.path, [data])
+        except OSError:
+            pass
+
+def plan_restore(backup_path, target_folder, hash_cache=None):
+    """Compares a backup with `target_folder` without changing anything (a dry run).
+
+    Returns [{"file", "size", "action"}] where action is "create" (missing from the
+    target), "replace" (different size or content) or "same". Sizes are compared
+    first, so only same-size files are hashed, and hash_cache skips unchanged files.
+    """
+    hash_cache = hash_cache or HashCache()
+    manifest = read_manifest(backup_path)
+    if manifest is not None:
+        wanted = {name: (entry["sha256"], entry["size"]) for name, entry in manifest["files"].items()}
+    else:
+        wanted = {}
+        for filename in sorted(os.listdir(backup_path)):
+            path = os.path.join(backup_path, filename)
+            if os.path.isfile(path): wanted[filename] = (None, os.path.getsize(path)) # Hashed only if the target has the same size
+    plan = []
+    for filename, (digest, size) in sorted(wanted.items()):
+        target_path = os.path.join(target_folder, filename)
+        try:
+            target_size = os.path.getsize(target_path)
+        except OSError:
+            action = "create"
+        else:
+            if target_size != size:
+                action = "replace"
+            else:
+                digest = digest or hash_cache.digest(os.path.join(backup_path, filename))[0]
+                action = "same" if hash_cache.digest(target_path)[0] == digest else "replace"
+        plan.append({"file": filename, "size": size, "action": action})
+    return plan
+
+def describe_plan(plan, limit=10):
+    """A short human-readable diff of a restore plan."""
+    changes = [item for item in plan if item["action"] != "same"]
+    lines = [f"{'+' if item['action'] == 'create' else '~'} {item['file']}" for item in changes[:limit]]
+    if len(changes) > limit: lines.append(f"... and {len(changes) - limit} more")
+    same = len(plan) - len(changes)
+    if same: lines.append(f"{same} file(s) already match and will be skipped.")
+    return "\n".join(lines)
+
+# --- Manifests ---
+def write_manifest(backup_path, files):
+    manifest = {"format": MANIFEST_VERSION, "created": datetime.now().isoformat(timespec='seconds'), "files": files}
+    _write_atomic(os.path.join(backup_path, MANIFEST_NAME), [json.dumps(manifest, indent=1).encode('utf-8')])
+
+def read_manifest(backup_path):
+    """Returns the manifest of a backup, or None for a legacy backup of plain copies."""
+    try:
+        with open(os.path.join(backup_path, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest.get("files"), dict) else None
+
+def list_backups(fonts_folder, index=None):
+    """Returns the names of restorable backups in `fonts_folder`/Fonts.old, newest first.
+
+    With a font_index.DirectoryIndex, unchanged backup folders are not listed again.
+    """
+    base = os.path.join(fonts_folder, BACKUP_FOLDER_NAME)
+    if index is not None:
+        return sorted((name for name in index.dirs(base) if not name.startswith('.') and index.files(os.path.join(base, name))), reverse=True)
+    try:
+        entries = [e for e in os.scandir(base) if e.is_dir() and not e.name.startswith('.')] # Skips a folder's own .fontbackups store
+    except OSError:
+        return []
+    return sorted((e.name for e in entries if _has_files(e.path)), reverse=True)
+
+# --- Command Line ---
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Migrates legacy Fonts.old backups into the shared backup store, or restores them.")
+    parser.add_argument("command", choices=["migrate", "restore"])
+    parser.add_argument("path", help="A Roblox 'Versions' folder, or a single fonts folder")
+    parser.add_argument("--store", help="The blob store to use (default: the one next to the Roblox install, see store_root_for)")
+    parser.add_argument("--compression", choices=["zlib", "lzma"], default=DEFAULT_COMPRESSION)
+    parser.add_argument("--dry-run", action="store_true", help="restore: only show what would change")
+    parser.add_argument("--workers", type=int, default=4, help="restore: folders restored at the same time")
+    args = parser.parse_args(argv)
+
+    is_fonts_folder = os.path.isdir(os.path.join(args.path, BACKUP_FOLDER_NAME))
+    # A 'Versions' folder's store is the one its version folders use: <Roblox>/FontBackups
+    store = BackupStore(args.store or store_root_for(args.path if is_fonts_folder else os.path.join(args.path, 'v', 'content', 'fonts')), args.compression)
+    if args.command == "restore":
+        if is_fonts_folder:
+            folders = [args.path]
+        else:
+            folders = [os.path.join(args.path, v, 'content', 'fonts') for v in sorted(os.listdir(args.path))]
+        jobs = [(os.path.join(f, BACKUP_FOLDER_NAME, list_backups(f)[0]), f) for f in folders if list_backups(f)]
+        results = store.restore_many(jobs, args.workers, dry_run=args.dry_run)
+        for folder, plan in results.items():
+            print(f"{folder}:\n{describe_plan(plan) or 'Backup is empty.'}")
+        changed = sum(1 for plan in results.values() for item in plan if item["action"] != "same")
+        print(f"{'Would restore' if args.dry_run else 'Restored'} {changed} file(s) in {len(results)} folder(s).")
+        return 0
+    if is_fonts_folder:
+        migrated, freed = store.migrate_fonts_folder(args.path)
+    else:
+        migrated, freed = store.migrate_versions(args.path)
+    print(f"Migrated {migrated} backup(s), freed {freed / 1024 / 1024:.1f} MB.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
+'''
+
+FONT_DEPLOY_CODE = r'''
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# User requested token for scripts
+# mvy9amhku0l3b2kq0cemzduy6czqm8
+
+# --- Configuration ---
+DEFAULT_DEPLOY_MODE = "link" # "link": copy once per volume then hardlink, "copy": always write a full copy
+FICLONE = 0x40049409 # Linux ioctl that shares extents between files on btrfs/XFS (reflink)
+CHUNK_SIZE = 1024 * 1024
+STAGING_FOLDER_NAME = ".rfm-staging" # Created inside the fonts folder, so staged files are on the same volume
+JOURNAL_NAME = "journal.json"
+
+# --- Low-level Copy Helpers ---
+def _clone_into(src, dst):
+    """Copies `src` into `dst` (open binary files) with the cheapest method the filesystem allows."""
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except OSError:
+            pass
+    if hasattr(os, 'copy_file_range'):
+        try:
+            size = os.fstat(src.fileno()).st_size
+            offset = 0
+            while offset < size:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), size - offset, offset, offset)
+                if copied == 0: break
+                offset += copied
+            if offset == size:
+                return "copy_file_range"
+            dst.seek(0); dst.truncate()
+        except OSError:
+            dst.seek(0); dst.truncate()
+    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+    return "copy"
+
+def _temp_path(dest_path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path), prefix='.rfm-', suffix='.tmp')
+    return fd, tmp_path
+
+def copy_atomic(source_path, dest_path):
+    """Copies `source_path` over `dest_path` through a temp file and os.replace. Returns the copy method used.
+
+    Replacing instead of writing into the existing file matters: the destination may
+    be a hardlink shared with other deployed fonts.
+    """
+    fd, tmp_path = _temp_path(dest_path)
+    try:
+        with open(source_path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            method = _clone_into(src, dst)
+        shutil.copystat(source_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+        return method
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
+
+def link_atomic(master_path, dest_path):
+    """Points `dest_path` at the same file as `master_path` with a hardlink, replacing whatever was there."""
+    fd, tmp_path = _temp_path(dest_path)
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        os.link(master_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
+
+# --- Deployer ---
+class FontDeployer:
+    """Writes one source font to many destinations, writing its bytes at most once per volume.
+
+    The first destination on each volume gets a real copy (a reflink where the
+    filesystem supports it); later destinations on that volume are hardlinked to it.
+    Destinations on another volume, or on filesystems without hardlinks, get their
+    own copy.
+    """
+
+    def __init__(self, source_path, mode=DEFAULT_DEPLOY_MODE):
+        if mode not in ("link", "copy"):
+            raise ValueError(f"Unknown deploy mode '{mode}'. Use 'link' or 'copy'.")
+        self.source_path = source_path
+        self.mode = mode
+        self.size = os.path.getsize(source_path)
+        self.masters = {} # st_dev -> first deployed copy on that volume
+        self.lock = threading.Lock() # A deployer may be shared by several replacement workers
+        self.stats = {"files": 0, "bytes_written": 0, "bytes_avoided": 0, "copies": 0, "reflinks": 0, "hardlinks": 0, "cross_device": 0}
+
+    def deploy(self, dest_path):
+        """Deploys the source font to `dest_path` and returns how: "hardlink", "reflink", "copy_file_range" or "copy"."""
+        device = os.stat(os.path.dirname(dest_path) or '.').st_dev
+        with self.lock:
+            master = self.masters.get(device)
+        method = None
+        if self.mode == "link" and master is not None:
+            try:
+                link_atomic(master, dest_path)
+                method = "hardlink"
+            except OSError:
+                pass # No hardlink support (FAT, too many links): fall back to a copy
+        if method is None:
+            method = copy_atomic(self.source_path, dest_path)
+
+        with self.lock:
+            if method != "hardlink":
+                if self.masters and device not in self.masters:
+                    self.stats["cross_device"] += 1
+                self.masters.setdefault(device, dest_path)
+            self.stats["files"] += 1
+            if method in ("hardlink", "reflink"):
+                self.stats["bytes_avoided"] += self.size
+                self.stats["hardlinks" if method == "hardlink" else "reflinks"] += 1
+            else:
+                self.stats["bytes_written"] += self.size
+                self.stats["copies"] += 1
+        return method
+
+    def moved(self, old_path, new_path):
+        """Tells the deployer a deployed file was renamed, so later hardlinks use its new path."""
+        with self.lock:
+            for device, master in self.masters.items():
+                if master == old_path: self.masters[device] = new_path
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['files']} file(s): {s['copies']} copied, {s['reflinks']} reflinked, {s['hardlinks']} hardlinked; "
+                f"{s['bytes_written'] / 1024 / 1024:.1f} MB written, {s['bytes_avoided'] / 1024 / 1024:.1f} MB avoided"
+                + (f", {s['cross_device']} cross-device" if s['cross_device'] else ""))
+
+# --- Staged Swap ---
+def _write_journal(staging_path, journal):
+    fd, tmp_path = _temp_path(os.path.join(staging_path, JOURNAL_NAME))
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(journal, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(staging_path, JOURNAL_NAME))
+
+def _read_journal(staging_path):
+    try:
+        with open(os.path.join(staging_path, JOURNAL_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def staged_swap(folder, filenames, deployer, backup_path=None, make_backup=None):
+    """Deploys the deployer's font over `filenames` in `folder`, swapping every file in at the end.
+
+    All new files are written into `folder`/.rfm-staging first, while the originals
+    stay untouched. Only then is the journal marked "swapping" and each file moved
+    over its original with os.replace, so no font is ever missing and the folder is
+    a mix of old and new fonts only for the length of the rename loop. Returns
+    {"files", "bytes_written", "stage_seconds", "swap_seconds"}; swap_seconds is that mixed window.
+
+    A failure is cleaned up before it is raised, the same way recover() would after a
+    crash: while staging, the staged files and `backup_path` are dropped; while
+    swapping, the remaining files are moved in (if that fails too, the journal is
+    left for the next recover()). make_backup(), if given, should create the backup
+    at `backup_path`: it is only called once the journal names that path, so no
+    failure or crash can leave a backup behind for fonts that were never replaced.
+    """
+    recover(folder) # Finish whatever an earlier crash left behind before staging again
+    staging_path = os.path.join(folder, STAGING_FOLDER_NAME)
+    journal = {"phase": "staging", "files": list(filenames), "backup": backup_path, "started": datetime.now().isoformat(timespec='seconds')}
+    started, bytes_written = time.perf_counter(), 0
+    try:
+        os.makedirs(staging_path, exist_ok=True)
+        _write_journal(staging_path, journal)
+        if make_backup: make_backup()
+        for filename in filenames:
+            if deployer.deploy(os.path.join(staging_path, filename)) not in ("hardlink", "reflink"): bytes_written += deployer.size
+        staged = time.perf_counter()
+        journal["phase"] = "swapping"
+        _write_journal(staging_path, journal) # From here on, recover() rolls forward
+    except BaseException:
+        _roll_back(staging_path, backup_path) # Disk full, access denied...: the originals were never touched
+        raise
+
+    swap_started = time.perf_counter()
+    try:
+        for filename in filenames:
+            os.replace(os.path.join(staging_path, filename), os.path.join(folder, filename))
+    except OSError:
+        recover(folder) # A file was locked mid-swap: retry the rest now rather than leave the folder half swapped
+    swapped = time.perf_counter()
+    for filename in filenames:
+        deployer.moved(os.path.join(staging_path, filename), os.path.join(folder, filename))
+    shutil.rmtree(staging_path, ignore_errors=True)
+    return {"files": len(filenames), "bytes_written": bytes_written, "stage_seconds": staged - started, "swap_seconds": swapped - swap_started}
+
+def recover(folder):
+    """Finishes a staged swap interrupted in `folder`. Returns "rolled_forward", "rolled_back" or None.
+
+    If swapping had started, the remaining staged files are moved in. Otherwise the
+    originals were never touched: the staged files are dropped, together with the
+    backup made for that run, so the folder counts as not yet replaced again.
+    """
+    staging_path = os.path.join(folder, STAGING_FOLDER_NAME)
+    if not os.path.isdir(staging_path): return None
+    journal = _read_journal(staging_path) or {"phase": "staging"}
+    if journal["phase"] == "swapping":
+        for filename in journal["files"]:
+            staged = os.path.join(staging_path, filename)
+            if os.path.isfile(staged): os.replace(staged, os.path.join(folder, filename))
+        action = "rolled_forward"
+    else:
+        _drop_backup(journal.get("backup"))
+        action = "rolled_back"
+    shutil.rmtree(staging_path) # The journal goes last, so an interrupted recovery is simply run again
+    return action
+
+def _drop_backup(backup_path):
+    """Deletes the backup made for a swap that was rolled back, so the folder counts as not yet replaced again."""
+    if backup_path and os.path.isdir(backup_path):
+        shutil.rmtree(backup_path)
+        try: os.rmdir(os.path.dirname(backup_path)) # Fonts.old, if that was its only backup
+        except OSError: pass
+
+def _roll_back(staging_path, backup_path):
+    """Undoes a swap that failed while staging, from inside the process that was running it."""
+    try:
+        _drop_backup(backup_path)
+        shutil.rmtree(staging_path) # Last, as in recover(): if anything above failed, the journal is still there for recover()
+    except OSError:
+        pass
+'''
+
+FONT_LOG_CODE = r'''
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+
+# User requested token for scripts
+# mvy9amhku0l3b2kq0cemzduy6czqm8
+
+# --- Configuration ---
+DEFAULT_MAX_BYTES = 1024 * 1024 # Rotate once the log reaches this size (0 disables size rotation)
+DEFAULT_BACKUP_COUNT = 3 # Rotated files kept as <name>.1 ... <name>.N
+DEFAULT_FLUSH_INTERVAL = 1.0 # Seconds the writer waits to batch messages before flushing
+
+# --- Log Sink ---
+class LogSink:
+    """Queue-backed log file writer.
+
+    write() only timestamps the message and puts it on a queue; a background thread
+    writes whatever has queued up in one batch, flushes once, and rotates the file
+    by size and/or age. With json_lines=True each record is a JSON object instead of
+    a "[timestamp] message" line.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT, rotate_seconds=None, json_lines=False, echo=False, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_seconds = rotate_seconds
+        self.json_lines = json_lines
+        self.echo = echo
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.file = None
+        self.opened_at = None
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="rfm-log", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, message, **fields):
+        """Queues `message` (plus optional structured `fields` for JSON-lines output)."""
+        if self.closed: return
+        self.queue.put((datetime.now(), message, fields))
+
+    def flush(self, timeout=5):
+        """Blocks until everything queued so far has been written."""
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        if self.closed: return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join(5)
+
+    # --- Writer Thread ---
+    def _format(self, timestamp, message, fields):
+        if self.json_lines:
+            record = {"time": timestamp.isoformat(timespec='milliseconds'), "message": message}
+            record.update(fields)
+            return json.dumps(record, default=str) + "\n"
+        return f"[{timestamp.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n"
+
+    def _open(self):
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.opened_at = time.monotonic()
+
+    def _should_rotate(self):
+        if self.max_bytes and self.file.tell() >= self.max_bytes: return True
+        return bool(self.rotate_seconds) and time.monotonic() - self.opened_at >= self.rotate_seconds
+
+    def _rotate(self):
+        self.file.close() # Windows cannot rename a file that is still open
+        self.file = None
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                older = f"{self.path}.{i}"
+                if os.path.exists(older): os.replace(older, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def _write_batch(self, batch):
+        if self.file is None: self._open()
+        for timestamp, message, fields in batch:
+            line = self._format(timestamp, message, fields)
+            self.file.write(line)
+            if self.echo and sys.stdout: print(line, end='')
+        self.file.flush()
+        if self._should_rotate(): self._rotate()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            batch, waiters, stop = [], [], False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None: stop = True
+                elif isinstance(item, threading.Event): waiters.append(item)
+                else: batch.append(item)
+                if stop or waiters: break
+                try:
+                    item = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception:
+                    pass # Logging must never take down the caller; the next batch retries the file
+            for waiter in waiters: waiter.set()
+            if stop:
+                if self.file: self.file.close()
+                return
+'''
+
+FONT_INDEX_CODE = r'''
+import os
+import stat
+import time
+import threading
+from collections import namedtuple
+
+# User requested token for scripts
+# mvy9amhku0l3b2kq0cemzduy6czqm8
+
+# --- Configuration ---
+RACY_SECONDS = 2 # A folder modified this recently is always rescanned (FAT keeps mtimes to 2 seconds)
+BACKUP_FOLDER_NAME = "Fonts.old"
+
+# --- Entries ---
+Snapshot = namedtuple("Snapshot", "mtime_ns files dirs")
+VersionEntry = namedtuple("VersionEntry", "name fonts_folder has_fonts has_backup fonts_mtime_ns")
+
+# --- Directory Index ---
+class DirectoryIndex:
+    """Caches os.scandir() listings per folder, keyed by the folder's mtime.
+
+    Adding, removing or renaming an entry changes its folder's mtime, so a folder
+    that has not changed costs one stat() instead of a listing plus a stat per
+    entry. Only names are cached; file contents are not tracked.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshots = {}
+        self.stats = {"stats": 0, "scans": 0, "hits": 0}
+
+    def _count(self, key):
+        with self.lock: self.stats[key] += 1
+
+    def snapshot(self, path):
+        """Returns the Snapshot of `path`, rescanning it only if it changed. None if it is not a folder."""
+        self._count("stats")
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISDIR(st.st_mode):
+            self.forget(path)
+            return None
+        with self.lock:
+            cached = self.snapshots.get(path)
+        racy = time.time_ns() - st.st_mtime_ns < RACY_SECONDS * 1000000000
+        if cached and cached.mtime_ns == st.st_mtime_ns and not racy:
+            self._count("hits")
+            return cached
+        self._count("scans")
+        files, dirs = set(), set()
+        try:
+            with os.scandir(path) as it:
+                for entry in it: # is_dir()/is_file() come from the listing itself on Windows and most Linux filesystems
+                    if entry.is_dir(): dirs.add(entry.name)
+                    elif entry.is_file(): files.add(entry.name)
+        except OSError:
+            self.forget(path)
+            return None
+        snapshot = Snapshot(st.st_mtime_ns, frozenset(files), frozenset(dirs))
+        with self.lock: self.snapshots[path] = snapshot
+        return snapshot
+
+    def files(self, path, extensions=None):
+        """Sorted names of the files in `path`, optionally only those ending in `extensions` (case-insensitive)."""
+        snapshot = self.snapshot(path)
+        if snapshot is None: return []
+        return sorted(f for f in snapshot.files if extensions is None or f.lower().endswith(extensions))
+
+    def dirs(self, path):
+        snapshot = self.snapshot(path)
+        return sorted(snapshot.dirs) if snapshot else []
+
+    def version(self, versions_root, name):
+        """Returns a VersionEntry for one Roblox version folder, from a single stat when nothing changed."""
+        fonts_folder = os.path.join(versions_root, name, 'content', 'fonts')
+        snapshot = self.snapshot(fonts_folder)
+        if snapshot is None: return VersionEntry(name, fonts_folder, False, False, None)
+        return VersionEntry(name, fonts_folder, True, BACKUP_FOLDER_NAME in snapshot.dirs, snapshot.mtime_ns)
+
+    def versions(self, versions_root):
+        """Returns {name: VersionEntry} for every version folder under `versions_root`."""
+        return {name: self.version(versions_root, name) for name in self.dirs(versions_root)}
+
+    def forget(self, path=None):
+        """Drops the cached listing of `path`, or of every folder."""
+        with self.lock:
+            if path is None: self.snapshots.clear()
+            else: self.snapshots.pop(path, None)
+'''
+
+FONT_METRICS_CODE = r'''
+import os
+import io
+import json
+import time
+import threading
+
+from font_log import LogSink
+
+# User requested token for scripts
+# mvy9amhku0l3b2kq0cemzduy6czqm8
+
+# --- Configuration ---
+SLOWEST_KEPT = 5 # Slowest cycles reported by the status endpoint
+PROFILE_TOP_LINES = 30 # Functions/allocation sites listed in the profile summary
+
+# --- Cycle Metrics ---
+class CycleMetrics:
+    """Opt-in timings and counters for the monitor loop, one record per cycle.
+
+    Records go to a JSON-lines file (rotated by font_log.LogSink) and/or a local
+    status endpoint. With profile_cycles > 0, cProfile and tracemalloc run over the
+    first that many cycles and a summary is written to `profile_path`. When nothing
+    is enabled every call is a cheap no-op.
+    """
+
+    def __init__(self, path=None, status_address=None, profile_cycles=0, profile_path=None):
+        self.enabled = bool(path or status_address or profile_cycles)
+        self.sink = LogSink(path, json_lines=True) if path else None
+        self.lock = threading.Lock()
+        self.cycle = 0
+        self.current = None
+        self.latest = None
+        self.slowest = []
+        self.totals = {"cycles": 0, "seconds": 0.0, "busy_seconds": 0.0, "counters": {}}
+        self.profile_cycles = profile_cycles
+        self.profile_path = profile_path or (os.path.splitext(path)[0] + "_profile.txt" if path else "font_manager_profile.txt")
+        self.profiler = None
+        self.server = start_status_server(status_address, self.status) if status_address else None
+
+    # --- Recording ---
+    def begin_cycle(self):
+        if not self.enabled: return
+        self.cycle += 1
+        now = time.perf_counter()
+        self.current = {"started": now, "lap": now, "phases": {}, "counters": {}}
+        if self.cycle == 1 and self.profile_cycles: self._start_profile()
+
+    def lap(self, name):
+        """Adds the time since the previous lap (or the start of the cycle) to phase `name`."""
+        if not self.enabled or self.current is None: return
+        now = time.perf_counter()
+        phases = self.current["phases"]
+        phases[name] = phases.get(name, 0.0) + now - self.current["lap"]
+        self.current["lap"] = now
+
+    def count(self, name, amount=1):
+        """Adds to counter `name`; safe to call from the replacement worker threads."""
+        if not self.enabled: return
+        with self.lock:
+            if self.current is not None:
+                self.current["counters"][name] = self.current["counters"].get(name, 0) + amount
+
+    def end_cycle(self, idle_phases=("wait",), **fields):
+        """Closes the current cycle and exports its record. Time in `idle_phases` does not count as busy."""
+        if not self.enabled or self.current is None: return None
+        seconds = time.perf_counter() - self.current["started"]
+        with self.lock:
+            counters, self.current["counters"] = self.current["counters"], {}
+        phases = self.current["phases"]
+        busy = seconds - sum(phases.get(p, 0.0) for p in idle_phases)
+        record = {"cycle": self.cycle, "seconds": round(seconds, 6), "busy_seconds": round(busy, 6),
+                  "phases": {k: round(v, 6) for k, v in phases.items()}, "counters": counters}
+        record.update(fields)
+        if self.profiler is not None:
+            import tracemalloc
+            record["memory_current"], record["memory_peak"] = tracemalloc.get_traced_memory()
+            if self.cycle >= self.profile_cycles: self._stop_profile()
+        self.current = None
+        with self.lock:
+            self.latest = record
+            self.slowest = sorted(self.slowest + [record], key=lambda r: r["busy_seconds"], reverse=True)[:SLOWEST_KEPT]
+            self.totals["cycles"] += 1
+            self.totals["seconds"] += seconds
+            self.totals["busy_seconds"] += busy
+            for name, amount in counters.items():
+                self.totals["counters"][name] = self.totals["counters"].get(name, 0) + amount
+        if self.sink: self.sink.write("cycle", **record)
+        return record
+
+    def status(self):
+        """The snapshot served by the status endpoint."""
+        with self.lock:
+            return {"pid": os.getpid(), "latest": self.latest, "slowest": list(self.slowest),
+                    "totals": dict(self.totals, counters=dict(self.totals["counters"]))}
+
+    # --- Profiling ---
+    def _start_profile(self):
+        import cProfile
+        import tracemalloc
+        tracemalloc.start()
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def _stop_profile(self):
+        import pstats
+        import tracemalloc
+        self.profiler.disable()
+        out = io.StringIO()
+        out.write(f"--- cProfile over {self.cycle} cycle(s), by cumulative time ---\n")
+        pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_LINES)
+        out.write(f"--- Top {PROFILE_TOP_LINES} allocation sites (tracemalloc) ---\n")
+        for stat in tracemalloc.take_snapshot().statistics("lineno")[:PROFILE_TOP_LINES]:
+            out.write(f"{stat}\n")
+        tracemalloc.stop()
+        self.profiler = None
+        try:
+            with open(self.profile_path, 'w', encoding='utf-8') as f: f.write(out.getvalue())
+        except OSError:
+            pass
+
+    def close(self):
+        if self.profiler is not None: self._stop_profile()
+        if self.server: self.server.shutdown()
+        if self.sink: self.sink.close()
+
+# --- Status Endpoint ---
+def start_status_server(address, snapshot):
+    """Serves `snapshot()` as JSON on a background thread.
+
+    `address` is "unix:/path/to.sock" (one JSON document per connection) or
+    "[http://]127.0.0.1:PORT" (any GET returns the document). The endpoint has no
+    authentication, so anything but a loopback host raises ValueError, as does a
+    Unix socket where the platform has none (Windows).
+    """
+    import ipaddress
+    import socket
+    import socketserver # Only loaded when a status endpoint is requested
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    if address.startswith("unix:"):
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError(f"Unix sockets are not supported on this system, use 127.0.0.1:PORT instead of '{address}'")
+        path = address[5:]
+        if os.path.exists(path): os.remove(path)
+
+        class UnixHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                self.request.sendall(json.dumps(snapshot()).encode('utf-8') + b"\n")
+
+        server = socketserver.ThreadingUnixStreamServer(path, UnixHandler)
+    else:
+        host, _, port = address.split("://", 1)[-1].rstrip("/").rpartition(":")
+        host = host.strip("[]") or "127.0.0.1"
+        try:
+            loopback = host == "localhost" or ipaddress.ip_address(host).is_loopback
+            port = int(port)
+        except ValueError:
+            loopback = False
+        if not loopback:
+            raise ValueError(f"The status endpoint only listens on this computer, use 127.0.0.1:PORT instead of '{address}'")
+
+        class HttpHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(snapshot(), indent=1).encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args): pass # Requests are not worth a line in the console
+
+        server_class = ThreadingHTTPServer
+        if ":" in host: # IPv6 loopback
+            server_class = type("ThreadingHTTPServer6", (ThreadingHTTPServer,), {"address_family": socket.AF_INET6})
+        server = server_class((host, port), HttpHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="rfm-status", daemon=True).start()
+    return server
+'''
+
+FONT_ENGINE_CODE = r'''
+import os
+import sys
+import time
+
+from font_deploy import DEFAULT_DEPLOY_MODE, FontDeployer, recover, staged_swap
+from font_store import BACKUP_FOLDER_NAME, FONT_EXTENSIONS, BackupStore, BackupStores, HashCache, new_backup_path
+
+# User requested token for scripts
+# mvy9amhku0l3b2kq0cemzduy6czqm8
+
+# --- Configuration ---
+KEPT_PREFIXES = ('twemoji',) # Emoji fonts are never replaced: a text font has no emoji glyphs
+DEFAULT_WORKERS = 4
+
+# --- Planning ---
+def is_kept(filename):
+    return filename.lower().startswith(KEPT_PREFIXES)
+
+def plan_deployment(source_path, fonts_folders, hash_cache=None, index=None, mode=DEFAULT_DEPLOY_MODE):
+    """Works out what deploying `source_path` to every folder of `fonts_folders` involves (a dry run).
+
+    Returns {"source", "sha256", "size", "mode", "folders", "totals"}. Each folder is
+    {"folder", "error", "files": [{"file", "size", "action"}]}, where action is
+    "replace" (backed up, then overwritten), "same" (already the source font, left
+    alone) or "keep" (emoji fonts). Only fonts with the source's size are hashed, and
+    hash_cache skips files hashed before. `index` is an optional font_index.DirectoryIndex.
+    """
+    hash_cache = hash_cache or HashCache()
+    source_digest, source_size = hash_cache.digest(source_path)
+    folders, devices = [], set()
+    for folder in fonts_folders:
+        entry = {"folder": folder, "error": None, "files": []}
+        folders.append(entry)
+        try:
+            if index is not None:
+                names = index.files(folder, FONT_EXTENSIONS) if os.path.isdir(folder) else None
+            else:
+                names = sorted(e.name for e in os.scandir(folder) if e.is_file() and e.name.lower().endswith(FONT_EXTENSIONS))
+            if names is None: raise FileNotFoundError(folder)
+            for name in names:
+                path = os.path.join(folder, name)
+                size = os.path.getsize(path)
+                if is_kept(name): action = "keep"
+                elif size == source_size and hash_cache.digest(path)[0] == source_digest: action = "same"
+                else: action = "replace"
+                entry["files"].append({"file": name, "size": size, "action": action})
+            if any(f["action"] == "replace" for f in entry["files"]): devices.add(os.stat(folder).st_dev)
+        except FileNotFoundError:
+            entry["error"] = "fonts folder not found"
+        except OSError as e:
+            entry["error"] = str(e)
+
+    totals = {"folders": len(folders), "failed": sum(1 for f in folders if f["error"]), "replace": 0, "same": 0, "keep": 0, "backup_bytes": 0}
+    for entry in folders:
+        for item in entry["files"]:
+            totals[item["action"]] += 1
+            if item["action"] == "replace": totals["backup_bytes"] += item["size"]
+    # Upper bound: "link" writes the font once per volume, reflinks can make even that free
+    totals["write_bytes"] = source_size * (len(devices) if mode == "link" else totals["replace"])
+    return {"source": source_path, "sha256": source_digest, "size": source_size, "mode": mode, "folders": folders, "totals": totals}
+
+def describe_deployment(plan, limit=10):
+    """A short human-readable summary of a deployment plan."""
+    t = plan["totals"]
+    lines = [f"~ {entry['folder']}: " + (entry["error"] or f"{sum(1 for f in entry['files'] if f['action'] == 'replace')} font(s) to replace")
+             for entry in plan["folders"][:limit]]
+    if len(plan["folders"]) > limit: lines.append(f"... and {len(plan['folders']) - limit} more folder(s)")
+    lines.append(f"{t['replace']} font(s) to replace in {t['folders'] - t['failed']} folder(s)"
+                 + (f", {t['same']} already up to date" if t["same"] else "") + (f", {t['keep']} emoji font(s) kept" if t["keep"] else "") + ".")
+    lines.append(f"Backs up {t['backup_bytes'] / 1024 / 1024:.1f} MB and writes at most {t['write_bytes'] / 1024 / 1024:.1f} MB.")
+    return "\n".join(lines)
+
+# --- Execution ---
+def execute_folder(entry, deployer, store, hash_cache=None):
+    """Backs up and replaces the fonts of one planned folder. Never raises; failures are reported in the result.
+
+    Returns {"folder", "ok", "error", "backup_path", "backup", "swap", "kept", "same", "seconds"}.
+    The backup is written even when nothing is replaced: its Fonts.old folder marks
+    the folder as processed. So it is made inside the staged swap, whose journal
+    names it first: if the swap fails or the process dies, the backup goes too and
+    the folder is retried rather than counted as processed with its stock fonts.
+    """
+    started = time.monotonic()
+    folder = entry["folder"]
+    result = {"folder": folder, "ok": False, "error": entry["error"], "backup_path": None, "backup": None, "swap": None,
+              "kept": [f["file"] for f in entry["files"] if f["action"] == "keep"],
+              "same": [f["file"] for f in entry["files"] if f["action"] == "same"]}
+    if entry["error"] is None:
+        targets = [f["file"] for f in entry["files"] if f["action"] == "replace"]
+        try:
+            backup_path = new_backup_path(folder)
+            def make_backup(): result["backup"] = store.create_backup(folder, targets, hash_cache, backup_path)[1]
+            result["swap"] = staged_swap(folder, targets, deployer, backup_path, make_backup)
+            result["backup_path"], result["ok"] = backup_path, True
+        except Exception as e:
+            result["error"], result["backup"] = str(e), None
+            try: recover(folder) # Whatever the failed swap could not clean up itself; the monitor's scan tries again later
+            except OSError: pass
+    result["seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+def execute_plan(plan, deployer=None, store=None, hash_cache=None, workers=DEFAULT_WORKERS, on_result=None):
+    """Carries out a plan from plan_deployment() and returns the execute_folder() results, in plan order.
+
+    Every folder shares one FontDeployer and one HashCache, so the font is written
+    once per volume and hardlinked everywhere else, and no file is hashed twice.
+    Folders run on up to `workers` threads; on_result(result) is called from the
+    worker thread as each one finishes.
+    """
+    deployer = deployer or FontDeployer(plan["source"], plan["mode"])
+    store = store or BackupStores()
+    def run(entry):
+        result = execute_folder(entry, deployer, store, hash_cache)
+        if on_result: on_result(result)
+        return result
+    if workers <= 1 or len(plan["folders"]) <= 1:
+        return [run(entry) for entry in plan["folders"]]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rfm-deploy") as executor:
+        return list(executor.map(run, plan["folders"]))
+
+# --- Command Line ---
+def fonts_folders_under(path):
+    """`path` itself if it is a fonts folder, or every version under a Roblox 'Versions' folder that has no backup yet."""
+    versions = [os.path.join(path, v, 'content', 'fonts') for v in sorted(os.listdir(path))]
+    versions = [f for f in versions if os.path.isdir(f)]
+    if not versions: return [path]
+    return [f for f in versions if not os.path.isdir(os.path.join(f, BACKUP_FOLDER_NAME))]
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Plans and applies a custom font to Roblox fonts folders.")
+    parser.add_argument("source", help="The font file to deploy")
+    parser.add_argument("path", nargs="+", help="A Roblox 'Versions' folder (versions not yet replaced), or a fonts folder")
+    parser.add_argument("--store", help="The blob store to use (default: the one next to each folder's Roblox install)")
+    parser.add_argument("--mode", choices=["link", "copy"], default=DEFAULT_DEPLOY_MODE)
+    parser.add_argument("--dry-run", action="store_true", help="Only show the plan")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Folders processed at the same time")
+    args = parser.parse_args(argv)
+
+    hash_cache = HashCache()
+    plan = plan_deployment(args.source, [f for p in args.path for f in fonts_folders_under(p)], hash_cache, mode=args.mode)
+    print(describe_deployment(plan))
+    if args.dry_run: return 0
+    deployer = FontDeployer(args.source, args.mode)
+    results = execute_plan(plan, deployer, BackupStore(args.store) if args.store else BackupStores(), hash_cache, args.workers)
+    failed = [r for r in results if not r["ok"]]
+    for r in failed: print(f"FAILED {r['folder']}: {r['error']}")
+    print(f"Deployed to {len(results) - len(failed)} folder(s). {deployer.summary()}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
+'''
+
+# Shared modules imported by the scripts above, written next to them
+SUPPORT_MODULES = {
+    'font_store.py': FONT_STORE_CODE,
+    'font_deploy.py': FONT_DEPLOY_CODE,
+    'font_engine.py': FONT_ENGINE_CODE,
+    'font_log.py': FONT_LOG_CODE,
+    'font_index.py': FONT_INDEX_CODE,
+    'font_metrics.py': FONT_METRICS_CODE,
+}
+
+# --- SCRIPT BUNDLE ---
+# The scripts are installed as one zipapp of precompiled modules, built by the
+# Python that will run them (the .pyc format is tied to its version). A stamp
+# file records each source's hash, so an upgrade recompiles only what changed
+# and leaves the bundle alone when nothing did.
+BUNDLE_NAME = "RobloxFontManager.pyz"
+BUNDLE_STAMP_NAME = "bundle_version.json"
+BUNDLE_OPTIMIZE = 1 # Same as python -O: asserts are compiled out, docstrings are kept
+
+BUNDLE_MAIN_CODE = r'''
+"""Entry point of the bundle: pythonw RobloxFontManager.pyz [auto|manager|font_store] [arguments]"""
+import sys
+import runpy
+
+ENTRY_POINTS = {"auto": "auto_font_manager", "manager": "manager"}
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    module = ENTRY_POINTS.get(args[0], args[0]) if args else "manager"
+    sys.argv = sys.argv[:1] + args[1:] # argv[0] stays the .pyz path, so the scripts still find their install folder
+    runpy.run_module(module, run_name="__main__")
+'''
+
+BUNDLE_BUILDER_CODE = r'''
+import os
+import sys
+import json
+import time
+import struct
+import marshal
+import hashlib
+import zipfile
+import importlib.util
+
+def build(install_dir, bundle_name, stamp_name, optimize):
+    """Reads {filename: source} from stdin and writes the bundle. Prints a JSON summary."""
+    sources = json.loads(sys.stdin.read())
+    bundle_path = os.path.join(install_dir, bundle_name)
+    stamp_path = os.path.join(install_dir, stamp_name)
+    magic = importlib.util.MAGIC_NUMBER
+    hashes = {name: hashlib.sha256(source.encode('utf-8')).hexdigest() for name, source in sources.items()}
+    version = hashlib.sha256(json.dumps(hashes, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    try:
+        with open(stamp_path, 'r', encoding='utf-8') as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        stamp = {}
+    reusable = stamp.get("magic") == magic.hex() and stamp.get("optimize") == optimize and os.path.isfile(bundle_path)
+    old_hashes = stamp.get("sources", {}) if reusable else {}
+    if reusable and old_hashes == hashes:
+        print(json.dumps({"version": version, "compiled": [], "reused": sorted(hashes), "rewritten": False}))
+        return
+
+    compiled, reused, mtime = [], [], int(time.time())
+    old_bundle = zipfile.ZipFile(bundle_path) if reusable else None
+    tmp_path = bundle_path + ".tmp"
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as bundle: # Stored, not deflated: nothing to inflate at startup
+        for name, source in sorted(sources.items()):
+            member = name[:-3] + ".pyc"
+            if old_hashes.get(name) == hashes[name] and member in old_bundle.namelist():
+                data = old_bundle.read(member)
+                reused.append(name)
+            else:
+                code = compile(source, os.path.join(bundle_path, name), 'exec', optimize=optimize, dont_inherit=True)
+                data = magic + struct.pack('<III', 0, mtime, len(source.encode('utf-8')) & 0xFFFFFFFF) + marshal.dumps(code)
+                compiled.append(name)
+            bundle.writestr(zipfile.ZipInfo(member, date_time=time.localtime(mtime)[:6]), data)
+    if old_bundle: old_bundle.close()
+    os.replace(tmp_path, bundle_path)
+
+    stamp = {"version": version, "magic": magic.hex(), "python": sys.version.split()[0], "optimize": optimize,
+             "built": time.strftime('%Y-%m-%dT%H:%M:%S'), "sources": hashes}
+    with open(stamp_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(stamp, f, indent=1)
+    os.replace(stamp_path + ".tmp", stamp_path)
+    print(json.dumps({"version": version, "compiled": compiled, "reused": reused, "rewritten": True}))
+
+build(sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4]))
+'''
+
+def bundle_sources():
+    """Every module that goes into the bundle, by file name."""
+    return {"__main__.py": BUNDLE_MAIN_CODE, "auto_font_manager.py": AUTO_MANAGER_CODE, "manager.py": MANAGER_HUB_CODE, **SUPPORT_MODULES}
+
+def build_bundle(python_exe, install_dir):
+    """Builds (or updates) the bundle in `install_dir` with `python_exe` and returns the builder's summary."""
+    out = subprocess.run([python_exe, "-c", BUNDLE_BUILDER_CODE, install_dir, BUNDLE_NAME, BUNDLE_STAMP_NAME, str(BUNDLE_OPTIMIZE)],
+                         input=json.dumps(bundle_sources()), capture_output=True, text=True, encoding='utf-8',
+                         creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+    if out.returncode != 0:
+        raise Exception(f"Could not build {BUNDLE_NAME}: {(out.stderr.strip().splitlines() or ['unknown error'])[-1]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+# --- FONT METADATA ---
+# A small sfnt (TrueType/OpenType) reader for the tables the font chooser needs,
+# so fonts can be named and described without loading them into Windows.
+
+FONT_METADATA_CACHE_NAME = "font_metadata_cache.json"
+FONT_METADATA_VERSION = 1
+
+def _sfnt_tables(data, font_offset=0):
+    """Returns {tag: (offset, length)} for the table directory of the font at `font_offset`."""
+    if data[:4] == b'ttcf': # Font collection: describe its first font
+        font_offset = struct.unpack_from('>I', data, 12)[0]
+    num_tables = struct.unpack_from('>H', data, font_offset + 4)[0]
+    tables = {}
+    for i in range(num_tables):
+        tag, _, offset, length = struct.unpack_from('>4sIII', data, font_offset + 12 + i * 16)
+        if offset + length > len(data): raise ValueError(f"Table {tag!r} runs past the end of the file")
+        tables[tag.decode('latin-1')] = (offset, length)
+    return tables
+
+def _decode_name(platform_id, encoding_id, raw):
+    if platform_id == 3 or platform_id == 0:
+        return raw.decode('utf-16-be', errors='replace')
+    if platform_id == 1 and encoding_id == 0:
+        return raw.decode('mac_roman', errors='replace')
+    return None
+
+def _read_names(data, offset):
+    """Reads the `name` table, preferring Windows English (US) strings."""
+    _, count, string_offset = struct.unpack_from('>HHH', data, offset)
+    names, ranks = {}, {}
+    for i in range(count):
+        platform_id, encoding_id, language_id, name_id, length, str_offset = struct.unpack_from('>6H', data, offset + 6 + i * 12)
+        if name_id not in (1, 2, 4, 16, 17): continue
+        start = offset + string_offset + str_offset
+        text = _decode_name(platform_id, encoding_id, bytes(data[start:start + length]))
+        if not text: continue
+        rank = 0 if (platform_id, language_id) == (3, 0x409) else 1 if platform_id == 3 else 2
+        if rank < ranks.get(name_id, 3):
+            names[name_id], ranks[name_id] = text.strip('\0 '), rank
+    return names
+
+def parse_font_metadata(data):
+    """Parses font metadata out of sfnt bytes (or any buffer, such as an mmap)."""
+    tables = _sfnt_tables(data)
+    if 'name' not in tables: raise ValueError("Font has no 'name' table")
+    names = _read_names(data, tables['name'][0])
+    meta = {
+        "family": names.get(1) or names.get(16),
+        "typographic_family": names.get(16) or names.get(1),
+        "subfamily": names.get(17) or names.get(2) or "Regular",
+        "full_name": names.get(4) or names.get(1),
+        "weight": 400, "width": 5, "italic": False, "glyphs": None, "units_per_em": None,
+    }
+    if 'OS/2' in tables and tables['OS/2'][1] >= 64:
+        os2 = tables['OS/2'][0]
+        meta["weight"], meta["width"] = struct.unpack_from('>HH', data, os2 + 4)
+        meta["italic"] = bool(struct.unpack_from('>H', data, os2 + 62)[0] & 0x1)
+    if 'head' in tables and tables['head'][1] >= 46:
+        head = tables['head'][0]
+        meta["units_per_em"] = struct.unpack_from('>H', data, head + 18)[0]
+        meta["italic"] = meta["italic"] or bool(struct.unpack_from('>H', data, head + 44)[0] & 0x2)
+    if 'maxp' in tables and tables['maxp'][1] >= 6:
+        meta["glyphs"] = struct.unpack_from('>H', data, tables['maxp'][0] + 4)[0]
+    return meta
+
+def read_font_metadata(path):
+    """Parses the font at `path` through a read-only memory map, so only the pages it touches are read."""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse_font_metadata(data)
+
+class FontMetadataCache:
+    """Font metadata cached on disk, keyed by path, size and mtime, so only new or changed fonts are parsed."""
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("version") == FONT_METADATA_VERSION:
+                self.entries = cached.get("fonts", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def get(self, path):
+        """Returns the metadata for `path`, or None if the file is not a readable font (or is gone)."""
+        try:
+            st = os.stat(path)
+        except OSError: # Deleted or renamed while the list was being scanned
+            return None
+        entry = self.entries.get(path)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["meta"]
+        try:
+            meta = read_font_metadata(path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"   [WARNING] Could not read font metadata from {os.path.basename(path)}: {e}")
+            meta = None # Cached as well, so a broken file is not re-parsed on every refresh
+        self.entries[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "meta": meta}
+        self.dirty = True
+        return meta
+
+    def save(self, keep_paths=None):
+        """Writes the cache if anything changed, dropping entries not in `keep_paths`."""
+        if keep_paths is not None:
+            for path in set(self.entries) - set(keep_paths):
+                del self.entries[path]
+                self.dirty = True
+        if not self.dirty: return
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": FONT_METADATA_VERSION, "fonts": self.entries}, f)
+            os.replace(tmp_path, self.cache_path)
+            self.dirty = False
+        except OSError as e:
+            print(f"   [WARNING] Could not save font metadata cache: {e}")
+
+# --- PRESET FONT INGEST ---
+# Fonts.zip members are streamed straight into the install 'Fonts' folder,
+# without extracting the whole archive to a temp folder first.
+
+FONT_EXTENSIONS = ('.ttf', '.otf')
+INGEST_CHUNK_SIZE = 256 * 1024
+
+def _is_font_member(info):
+    name = info.filename.replace('\\', '/')
+    base = name.rsplit('/', 1)[-1]
+    return (not info.is_dir() and base.lower().endswith(FONT_EXTENSIONS)
+            and not base.startswith('._') and '__MACOSX/' not in name)
+
+def _hash_existing(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(INGEST_CHUNK_SIZE), b''): digest.update(chunk)
+    return digest.hexdigest()
+
+def ingest_fonts_zip(zip_path, dest_dir, progress=None, workers=1):
+    """Streams the font members of `zip_path` into `dest_dir` and returns a stats dict.
+
+    Members are read in chunks into a temp file next to their final location and
+    renamed into place, so nothing else from the archive is ever written. A font
+    whose content is identical to an earlier member in archive order (or already in
+    `dest_dir` under that name) is skipped. A corrupt, encrypted or unsupported-
+    compression member is skipped on its own. With workers > 1 members are read in
+    parallel, each worker with its own ZipFile handle, and `progress(done_bytes,
+    total_bytes)` is then called from those threads; the renames still happen in
+    archive order, so the same archive always installs the same file names.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        all_members = zf.infolist()
+    members = [info for info in all_members if _is_font_member(info)]
+    stats = {"fonts": 0, "duplicates": 0, "unchanged": 0, "errors": 0, "bytes_written": 0,
+             "skipped_members": len(all_members) - len(members), "total_bytes": sum(info.file_size for info in members)}
+    lock = threading.Lock()
+    done_bytes = [0]
+    read_members = [None] * len(members) # (temp path, digest, size, unchanged) per member, None if unreadable
+
+    def advance(count):
+        with lock:
+            done_bytes[0] += count
+            current = done_bytes[0]
+        if progress: progress(current, stats["total_bytes"])
+
+    def final_path_of(info):
+        return os.path.join(dest_dir, os.path.basename(info.filename.replace('\\', '/')))
+
+    def read_member(zf, index):
+        info = members[index]
+        final_path = final_path_of(info)
+        fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix='.ingest-', suffix='.tmp')
+        digest, read = hashlib.sha256(), 0
+        try:
+            with zf.open(info) as src, os.fdopen(fd, 'wb') as dst:
+                for chunk in iter(lambda: src.read(INGEST_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    dst.write(chunk)
+                    read += len(chunk)
+                    advance(len(chunk))
+            digest = digest.hexdigest()
+            unchanged = os.path.isfile(final_path) and os.path.getsize(final_path) == read and _hash_existing(final_path) == digest
+            read_members[index] = (tmp_path, digest, read, unchanged)
+        except (zipfile.BadZipFile, zlib.error, OSError, EOFError, RuntimeError, NotImplementedError) as e: # RuntimeError: encrypted, NotImplementedError: compression method
+            print(f"   [WARNING] Skipping unreadable member {info.filename}: {e}")
+            try: os.remove(tmp_path)
+            except OSError: pass
+            advance(info.file_size - read) # Keep the progress total reachable
+            with lock: stats["errors"] += 1
+
+    def read_all(batch):
+        with zipfile.ZipFile(zip_path, 'r') as zf:
+            for index in batch: read_member(zf, index)
+
+    workers = max(1, min(workers, len(members)))
+    try:
+        if workers == 1:
+            read_all(range(len(members)))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(read_all, [range(i, len(members), workers) for i in range(workers)]))
+
+        # Placed in archive order: the first member with a given content wins, whatever order the reads finished in
+        seen_hashes, written = set(), set()
+        for info, result in zip(members, read_members):
+            if result is None: continue
+            tmp_path, digest, read, unchanged = result
+            final_path = final_path_of(info)
+            duplicate = digest in seen_hashes
+            seen_hashes.add(digest)
+            if duplicate or (unchanged and final_path not in written): # An earlier member may have replaced that file
+                os.remove(tmp_path)
+                stats["duplicates" if duplicate else "unchanged"] += 1
+                continue
+            try:
+                os.replace(tmp_path, final_path)
+            except OSError as e:
+                print(f"   [WARNING] Could not install {info.filename}: {e}")
+                stats["errors"] += 1
+                continue
+            written.add(final_path)
+            stats["fonts"] += 1
+            stats["bytes_written"] += read
+    finally:
+        for result in read_members: # Leftovers of an interrupted run
+            if result and os.path.exists(result[0]):
+                try: os.remove(result[0])
+                except OSError: pass
+    return stats
+
+# --- DEPENDENCIES ---
+# psutil is optional: the auto manager falls back to its own process probes without it.
+# Wheels placed in a "wheels" folder next to the installer are installed without network access.
+PSUTIL_MIN_VERSION = (5, 6)
+WHEELS_DIR_NAME = "wheels"
+
+def installed_psutil_version(python_exe):
+    """Returns psutil's version tuple as seen by `python_exe`, or None if it cannot be imported."""
+    try:
+        out = subprocess.run([python_exe, "-c", "import psutil; print(psutil.__version__)"], capture_output=True, text=True,
+                             timeout=30, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if out.returncode != 0: return None
+    return tuple(int(part) for part in out.stdout.strip().split('.')[:3] if part.isdigit())
+
+def pip_install_command(python_exe, package, wheels_dir=None):
+    command = [python_exe, "-m", "pip", "install", "--disable-pip-version-check", package]
+    if wheels_dir: command[4:4] = ["--no-index", "--find-links", wheels_dir]
+    return command
+
+# --- PYTHON DISCOVERY ---
+# Candidates from PATH and the usual install roots are version-checked in parallel.
+# The chosen interpreter is cached with a size/mtime fingerprint, so reinstalls skip the search.
+PYTHON_MIN_VERSION = (3, 8)
+PYTHON_CACHE_NAME = "python_location.json"
+PYTHON_PROBE_TIMEOUT_SECONDS = 10
+
+def default_python_roots():
+    """Folders whose python* subfolders may hold an interpreter (python.org per-user and all-users installs)."""
+    roots = [os.path.join(os.getenv('LOCALAPPDATA', ''), 'Programs', 'Python')]
+    for env in ('ProgramFiles', 'ProgramFiles(x86)'):
+        if os.getenv(env):
+            roots += [os.path.join(os.getenv(env), 'Python'), os.getenv(env)]
+    roots.append(os.path.splitdrive(os.getenv('SystemRoot', 'C:\\'))[0] + os.sep) # Old C:\PythonXY layout
+    return [root for root in roots if os.path.isabs(root)]
+
+def probe_python_version(python_exe):
+    """Runs `python_exe` and returns its version tuple, or None if it does not start (e.g. the Store stub)."""
+    try:
+        out = subprocess.run([python_exe, "-c", "import sys; print('%d.%d.%d' % sys.version_info[:3])"], capture_output=True, text=True,
+                             timeout=PYTHON_PROBE_TIMEOUT_SECONDS, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    try:
+        return tuple(int(part) for part in out.stdout.strip().split('.')) if out.returncode == 0 else None
+    except ValueError:
+        return None
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+class PythonLocator:
+    """Finds the newest usable Python that also has a windowless interpreter next to it."""
+
+    def __init__(self, cache_path=None, roots=None, path_dirs=None, exe_name='python.exe', windowed_name='pythonw.exe',
+                 min_version=PYTHON_MIN_VERSION, probe=probe_python_version, workers=8):
+        self.cache_path = cache_path
+        self.roots = default_python_roots() if roots is None else roots
+        self.path_dirs = os.environ.get('PATH', '').split(os.pathsep) if path_dirs is None else path_dirs
+        self.exe_name, self.windowed_name = exe_name, windowed_name
+        self.min_version = tuple(min_version)
+        self.probe = probe
+        self.workers = workers
+
+    def candidates(self):
+        """Interpreter paths in preference order: PATH first, then python* folders under each root."""
+        found, seen = [], set()
+        def add(folder):
+            exe = os.path.join(folder, self.exe_name)
+            key = os.path.normcase(os.path.abspath(exe))
+            if key not in seen and os.path.isfile(exe):
+                seen.add(key)
+                found.append(exe)
+        for folder in self.path_dirs:
+            if folder: add(folder.strip('"'))
+        for root in self.roots:
+            try:
+                with os.scandir(root) as it:
+                    for entry in sorted(it, key=lambda e: e.name):
+                        if entry.name.lower().startswith('python') and entry.is_dir():
+                            add(entry.path)
+            except OSError:
+                continue
+        return found
+
+    def _check(self, python_exe):
+        windowed = os.path.join(os.path.dirname(python_exe), self.windowed_name)
+        if not os.path.isfile(windowed): return None
+        version = self.probe(python_exe)
+        if not version or version < self.min_version: return None
+        return {"python": python_exe, "pythonw": windowed, "version": list(version)}
+
+    def discover(self):
+        """Checks every candidate in parallel and returns the best match, or None."""
+        candidates = self.candidates()
+        if not candidates: return None
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(candidates))) as executor:
+            results = list(executor.map(self._check, candidates))
+        usable = [(result["version"], -index, result) for index, result in enumerate(results) if result]
+        return max(usable, key=lambda item: item[:2])[2] if usable else None
+
+    def load_cached(self):
+        """Returns the cached choice if both executables are still exactly as they were."""
+        if not self.cache_path: return None
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            for key in ("python", "pythonw"):
+                if _fingerprint(cached[key]) != cached["fingerprint"][key]: return None
+            if tuple(cached["version"]) < self.min_version: return None
+            return cached
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, choice):
+        if not self.cache_path: return
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            choice = dict(choice, fingerprint={key: _fingerprint(choice[key]) for key in ("python", "pythonw")})
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(choice, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"   [WARNING] Could not save Python location cache: {e}")
+
+    def locate(self):
+        """Returns {"python", "pythonw", "version"} from the cache or a fresh search, or None."""
+        choice = self.load_cached()
+        if choice:
+            print(f"Using cached Python {'.'.join(map(str, choice['version']))}: {choice['python']}")
+            return choice
+        choice = self.discover()
+        if choice:
+            print(f"Found Python {'.'.join(map(str, choice['version']))}: {choice['python']}")
+            self.save(choice)
+        return choice
+
+# --- INSTALLER APP ---
+
+class FontChooserApp:
+    FONT_ROW_HEIGHT = 120 # Every row has the same height, so the visible rows can be computed from the scroll offset
+    FONT_PAGE_SIZE = 40 # Fonts handed from the background loader to the UI at a time
+    PREVIEW_TEXT = "AaBbCcDdEeFfGgHhIiJjKkLlMmNnOoPpQqRrSsTtUuVvWwXxYyZz"
+
+    def __init__(self, parent, install_dir):
+        self.win = tk.Toplevel(parent)
+        self.win.title("Step 2: Choose Your Font")
+        self.win.geometry("600x650")
+        self.win.resizable(False, False)
+        self.win.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        self.install_dir = install_dir
+        self.fonts_dir = os.path.join(install_dir, "Fonts")
+        self.target_dir = os.path.join(install_dir, "PLACE YOUR CUSTOM FONT HERE")
+        self.loaded_fonts = []
+        self.metadata_cache = FontMetadataCache(os.path.join(install_dir, FONT_METADATA_CACHE_NAME))
+        self.metadata_lock = threading.Lock()
+
+        self.entries = [] # Every font found so far, in display order
+        self.visible_entries = [] # The entries matching the search box
+        self.rows = [] # Recycled row widgets, only enough to fill the visible area
+        self.preview_fonts = {} # font path -> tk Font, created the first time the font scrolls into view
+        self.font_pages = queue.Queue()
+        self.load_generation = 0
+
+        self._setup_ui()
+        self.win.after(100, self._load_and_display_fonts) # Load after window is shown
+
+    def _setup_ui(self):
+        header_frame = ttk.Frame(self.win, padding=10)
+        header_frame.pack(fill='x')
+        ttk.Label(header_frame, text="Select a Font", font=("Segoe UI", 16, "bold")).pack()
+        info_text = "Preset fonts are listed below. To add more, place them in the 'Fonts' folder\n" \
+                    "inside the installation directory, then click 'Refresh List'."
+        ttk.Label(header_frame, text=info_text, wraplength=580, justify='center').pack(pady=5)
+
+        search_frame = ttk.Frame(header_frame)
+        search_frame.pack(fill='x', pady=(5, 0))
+        ttk.Label(search_frame, text="Search:").pack(side='left')
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', lambda *_: self._apply_filter(reset_scroll=True))
+        ttk.Entry(search_frame, textvariable=self.search_var).pack(side='left', fill='x', expand=True, padx=(5, 0))
+        
+        ttk.Separator(self.win, orient='horizontal').pack(fill='x', padx=10, pady=5)
+
+        main_frame = ttk.Frame(self.win)
+        main_frame.pack(fill='both', expand=True)
+
+        self.canvas = tk.Canvas(main_frame, highlightthickness=0, yscrollincrement=self.FONT_ROW_HEIGHT // 4)
+        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=self._on_scroll)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas.bind("<Configure>", lambda e: self._render_rows())
+        self.empty_message = self.canvas.create_text(290, 40, text="", font=("Segoe UI", 12, "italic"))
+        
+        self.canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+
+        footer_frame = ttk.Frame(self.win, padding=10)
+        footer_frame.pack(fill='x', side='bottom')
+
+        self.status_label = ttk.Label(footer_frame, text="Ready.")
+        self.status_label.pack(side='left', anchor='w')
+
+        button_container = ttk.Frame(footer_frame)
         button_container.pack(side='right')
         ttk.Button(button_container, text="I have my own font...", command=self.select_custom_font).pack(side='left')
         ttk.Button(button_container, text="Refresh List", command=self._load_and_display_fonts).pack(side='left', padx=10)
@@ -649,51 +3663,162 @@ class FontChooserApp:
 
     def _on_mousewheel(self, event):
         self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-    
+        self._render_rows()
+
+    def _on_scroll(self, *args):
+        self.canvas.yview(*args)
+        self._render_rows()
+
+    # --- Background Loading ---
     def _load_and_display_fonts(self):
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        self.load_generation += 1 # Any loader still running for an older refresh stops at its next font
         self._unload_fonts()
+        self.preview_fonts = {}
+        self.entries, self.visible_entries = [], []
+        for row in self.rows: row["entry"] = None
 
         if not os.path.exists(self.fonts_dir):
             os.makedirs(self.fonts_dir)
 
-        font_files = [f for f in os.listdir(self.fonts_dir) if f.lower().endswith(('.ttf', '.otf'))]
-        total_fonts = len(font_files)
+        self.add_font_resource = ctypes.WinDLL('gdi32').AddFontResourceW
+        self.status_label.config(text="Scanning fonts...")
+        self._render_rows()
+        threading.Thread(target=self._scan_fonts, args=(self.load_generation,), daemon=True).start()
+        self.win.after(50, self._poll_font_pages, self.load_generation)
 
-        if not font_files:
-            ttk.Label(self.scrollable_frame, text="No fonts found. Add .ttf or .otf files to the 'Fonts' folder.", font=("Segoe UI", 12, "italic")).pack(pady=20)
-            self.status_label.config(text="No fonts found.")
-            return
+    def _scan_fonts(self, generation):
+        """Worker thread: reads font metadata and hands it to the UI a page at a time. Never touches Tk.
 
-        gdi32 = ctypes.WinDLL('gdi32')
-        add_font_resource = gdi32.AddFontResourceW
-        
-        for i, font_file in enumerate(sorted(font_files)):
-            self.status_label.config(text=f"Loading {i+1}/{total_fonts}: {font_file}")
-            self.win.update_idletasks() # Force UI update
+        Always ends with a (generation, None, total or error message) item, so the status never stays on "Scanning".
+        """
+        try:
+            self._scan_font_pages(generation)
+        except Exception as e:
+            self.font_pages.put((generation, None, f"Could not load the fonts: {e}"))
 
+    def _scan_font_pages(self, generation):
+        try:
+            font_files = sorted(f for f in os.listdir(self.fonts_dir) if f.lower().endswith(('.ttf', '.otf')))
+        except OSError as e:
+            self.font_pages.put((generation, None, f"Could not read the 'Fonts' folder: {e}"))
+            return
+
+        page, font_paths = [], []
+        for font_file in font_files:
+            if generation != self.load_generation: return
             font_path = os.path.join(self.fonts_dir, font_file)
-            font_name_no_ext = os.path.splitext(font_file)[0]
+            with self.metadata_lock:
+                meta = self.metadata_cache.get(font_path)
+            if meta is None and not os.path.isfile(font_path): continue # Removed since the folder was listed
+            font_paths.append(font_path)
+            page.append(self._make_entry(font_path, meta))
+            if len(page) >= self.FONT_PAGE_SIZE:
+                self.font_pages.put((generation, page, len(font_files)))
+                page = []
+        if page: self.font_pages.put((generation, page, len(font_files)))
+        with self.metadata_lock:
+            self.metadata_cache.save(keep_paths=font_paths)
+        self.font_pages.put((generation, None, len(font_files)))
 
-            if add_font_resource(font_path):
-                self.loaded_fonts.append(font_path)
-            
-            font_frame = ttk.Frame(self.scrollable_frame, padding=(0, 10))
-            font_frame.pack(fill='x', pady=5)
-            
-            try:
-                ttk.Label(font_frame, text=font_name_no_ext, font=("Segoe UI", 11, "bold")).pack(anchor='w')
-                preview_font = Font(family=font_name_no_ext, size=14)
-                ttk.Label(font_frame, text="AaBbCcDdEeFfGgHhIiJjKkLlMmNnOoPpQqRrSsTtUuVvWwXxYyZz", font=preview_font, wraplength=450).pack(anchor='w', pady=2)
-                ttk.Button(font_frame, text="Select", command=lambda p=font_path: self.set_font(p)).pack(anchor='e', pady=5)
-            except tk.TclError:
-                ttk.Label(font_frame, text=f"Could not preview: {font_name_no_ext}", font=("Segoe UI", 10, "italic")).pack(anchor='w')
-            
-            if i < total_fonts - 1:
-                ttk.Separator(font_frame, orient='horizontal').pack(fill='x', pady=10)
-        
-        self.status_label.config(text=f"Loaded {total_fonts} fonts.")
+    def _make_entry(self, font_path, meta):
+        font_name_no_ext = os.path.splitext(os.path.basename(font_path))[0]
+        family = meta["family"] if meta and meta["family"] else font_name_no_ext # File names are only a fallback guess
+        if meta:
+            title = f"{meta['full_name'] or family}  ·  weight {meta['weight']}" + (f"  ·  {meta['glyphs']} glyphs" if meta['glyphs'] else "")
+        else:
+            title = font_name_no_ext
+        search_fields = [os.path.basename(font_path), family, title]
+        if meta: search_fields += [meta["typographic_family"] or "", meta["subfamily"], str(meta["weight"]), "italic" if meta["italic"] else ""]
+        return {"path": font_path, "family": family, "title": title, "search": " ".join(search_fields).lower()}
+
+    def _poll_font_pages(self, generation):
+        if generation != self.load_generation or not self.win.winfo_exists(): return
+        done, total, error = False, None, None
+        try:
+            while True:
+                page_generation, page, info = self.font_pages.get_nowait()
+                if page_generation != generation: continue
+                if page is None:
+                    done = True
+                    if isinstance(info, str): error = info
+                    else: total = info
+                else:
+                    self.entries.extend(page)
+                    total = info
+        except queue.Empty:
+            pass
+
+        if error:
+            self.status_label.config(text=error)
+        elif done:
+            self.status_label.config(text=f"Loaded {len(self.entries)} fonts." if self.entries else "No fonts found.")
+        else:
+            if total: self.status_label.config(text=f"Loading {len(self.entries)}/{total} fonts...")
+            self.win.after(100, self._poll_font_pages, generation)
+        self._apply_filter()
+
+    # --- Virtualized List ---
+    def _apply_filter(self, reset_scroll=False):
+        query = self.search_var.get().strip().lower()
+        self.visible_entries = [e for e in self.entries if query in e["search"]] if query else list(self.entries)
+        if reset_scroll: self.canvas.yview_moveto(0)
+        self._render_rows()
+
+    def _make_row(self):
+        frame = ttk.Frame(self.canvas, padding=(10, 10))
+        title = ttk.Label(frame, font=("Segoe UI", 11, "bold"))
+        title.pack(anchor='w')
+        preview = ttk.Label(frame, text=self.PREVIEW_TEXT, wraplength=450)
+        preview.pack(anchor='w', pady=2)
+        button = ttk.Button(frame, text="Select")
+        button.pack(anchor='e', pady=(0, 5))
+        ttk.Separator(frame, orient='horizontal').pack(fill='x', side='bottom')
+        window = self.canvas.create_window(0, 0, window=frame, anchor='nw', height=self.FONT_ROW_HEIGHT, state='hidden')
+        return {"window": window, "title": title, "preview": preview, "button": button, "entry": None}
+
+    def _preview_font(self, entry):
+        """Loads a font into Windows and builds its preview Font the first time its row is shown."""
+        font = self.preview_fonts.get(entry["path"])
+        if font is None:
+            if self.add_font_resource(entry["path"]):
+                self.loaded_fonts.append(entry["path"])
+            font = self.preview_fonts[entry["path"]] = Font(family=entry["family"], size=14)
+        return font
+
+    def _bind_row(self, row, entry):
+        row["entry"] = entry
+        row["title"].config(text=entry["title"])
+        row["button"].config(command=lambda p=entry["path"]: self.set_font(p))
+        try:
+            row["preview"].config(text=self.PREVIEW_TEXT, font=self._preview_font(entry))
+        except tk.TclError:
+            row["preview"].config(text=f"Could not preview: {entry['title']}", font=("Segoe UI", 10, "italic"))
+
+    def _render_rows(self):
+        """Positions the recycled rows over whichever entries are currently scrolled into view."""
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        total = len(self.visible_entries)
+        self.canvas.configure(scrollregion=(0, 0, width, max(total * self.FONT_ROW_HEIGHT, height)))
+
+        while len(self.rows) < height // self.FONT_ROW_HEIGHT + 2:
+            self.rows.append(self._make_row())
+
+        first = max(0, int(self.canvas.canvasy(0)) // self.FONT_ROW_HEIGHT)
+        for offset, row in enumerate(self.rows):
+            index = first + offset
+            if index >= total:
+                self.canvas.itemconfigure(row["window"], state='hidden')
+                continue
+            entry = self.visible_entries[index]
+            if row["entry"] is not entry: self._bind_row(row, entry)
+            self.canvas.coords(row["window"], 0, index * self.FONT_ROW_HEIGHT)
+            self.canvas.itemconfigure(row["window"], state='normal', width=width)
+
+        if self.entries and not total: message = "No fonts match your search."
+        elif not self.entries and self.status_label.cget("text") == "No fonts found.": message = "No fonts found. Add .ttf or .otf files to the 'Fonts' folder."
+        else: message = ""
+        self.canvas.itemconfigure(self.empty_message, text=message)
+        self.canvas.coords(self.empty_message, width // 2, self.canvas.canvasy(0) + 40)
     
     def set_font(self, font_path):
         try:
@@ -757,37 +3882,14 @@ class InstallerApp:
         self.status_label.pack(pady=5)
 
     def find_python_executable(self):
+        """Returns (python.exe, pythonw.exe) for the newest suitable Python, or None."""
         self.update_status("Finding Python installation...")
-        try:
-            # Use 'where python' and take the first valid result
-            output = subprocess.check_output('where python', shell=True, text=True, stderr=subprocess.PIPE)
-            paths = output.strip().split('\n')
-            if paths:
-                py_exe = paths[0].strip()
-                print(f"Found Python using 'where' command: {py_exe}")
-                return py_exe
-        except subprocess.CalledProcessError:
-            print("'where python' command failed. Trying manual search...")
-
-        # Fallback to manual search if 'where' fails
-        common_paths = [
-            os.path.join(os.getenv('LOCALAPPDATA'), 'Programs', 'Python'),
-            os.path.join(os.getenv('ProgramFiles'), 'Python')
-        ]
-        for path in common_paths:
-            if os.path.isdir(path):
-                for folder in os.listdir(path):
-                    if folder.lower().startswith('python'):
-                        py_exe = os.path.join(path, folder, 'python.exe')
-                        if os.path.exists(py_exe):
-                            print(f"Found Python via manual search: {py_exe}")
-                            return py_exe
-        
-        return None
+        choice = PythonLocator(cache_path=os.path.join(self.install_dir, PYTHON_CACHE_NAME)).locate()
+        return (choice["python"], choice["pythonw"]) if choice else None
 
     def create_desktop_shortcut(self, pythonw_exe):
         self.update_status("Creating desktop shortcut...")
-        script_path = os.path.join(self.install_dir, 'manager.py')
+        bundle_path = os.path.join(self.install_dir, BUNDLE_NAME)
         desktop_path = os.path.join(os.path.expanduser('~'), 'Desktop')
         shortcut_path = os.path.join(desktop_path, 'Roblox Font Manager.lnk')
         
@@ -796,7 +3898,7 @@ class InstallerApp:
         sLinkFile = "{shortcut_path}"
         Set oLink = oWS.CreateShortcut(sLinkFile)
         oLink.TargetPath = "{pythonw_exe}"
-        oLink.Arguments = Chr(34) & "{script_path}" & Chr(34)
+        oLink.Arguments = Chr(34) & "{bundle_path}" & Chr(34) & " manager"
         oLink.WorkingDirectory = "{self.install_dir}"
         oLink.Save
         '''
@@ -807,117 +3909,200 @@ class InstallerApp:
         subprocess.call(['cscript', vbs_path], creationflags=subprocess.CREATE_NO_WINDOW)
         os.remove(vbs_path)
 
+    # --- Installation Pipeline ---
+    # The steps run on a worker thread and report to the UI through self.events.
+    # Steps that do not depend on each other run at the same time:
+    #   find Python | create folders  ->  preset fonts | script files | psutil  ->  auto-start | shortcut
+    INSTALL_PHASE_WEIGHTS = {"find_python": 10, "directories": 5, "preset_fonts": 25, "scripts": 10, "dependencies": 30, "startup": 10, "shortcut": 10}
+    INSTALL_TIMING_REPORT = "install_timing.json"
+
     def run_installation(self):
         self.main_frame.pack_forget()
         self.progress_frame.pack(fill="both", expand=True)
         self.root.update_idletasks()
-        
-        try:
-            print("--- Starting Roblox Font Manager Installation ---")
-            self.progress_bar['value'] = 0
 
-            if getattr(sys, 'frozen', False):
-                installer_dir = os.path.dirname(sys.executable)
-            else:
-                installer_dir = os.path.dirname(os.path.abspath(__file__))
+        print("--- Starting Roblox Font Manager Installation ---")
+        self.progress_bar['value'] = 0
 
-            source_fonts_zip = os.path.join(installer_dir, 'Fonts.zip')
-            
-            print(f"Installer is running from: {installer_dir}")
-            print(f"Checking for preset fonts at: {source_fonts_zip}")
-            
-            has_fonts_zip = os.path.isfile(source_fonts_zip)
+        if getattr(sys, 'frozen', False):
+            installer_dir = os.path.dirname(sys.executable)
+        else:
+            installer_dir = os.path.dirname(os.path.abspath(__file__))
 
-            if not has_fonts_zip:
-                messagebox.showwarning("No Fonts Found", "A 'Fonts.zip' file was not found next to the installer.\n\nThe program will be installed, but you will need to add fonts manually later.")
-            
-            # Step 1: Find Python (10%)
-            python_exe = self.find_python_executable()
-            if not python_exe: raise Exception("Could not find a Python installation. Please install Python from python.org or the Microsoft Store and try again.")
-            pythonw_exe = python_exe.replace('python.exe', 'pythonw.exe')
-            if not os.path.exists(pythonw_exe): raise Exception(f"pythonw.exe not found alongside {python_exe}")
-            self.progress_bar['value'] = 10; self.root.update_idletasks(); time.sleep(0.2)
-
-            # Step 2: Create Directories (20%)
-            self.update_status("Creating directories...")
-            os.makedirs(os.path.join(self.install_dir, "PLACE YOUR CUSTOM FONT HERE"), exist_ok=True)
-            destination_fonts_dir = os.path.join(self.install_dir, "Fonts")
-            os.makedirs(destination_fonts_dir, exist_ok=True)
-            self.progress_bar['value'] = 20; self.root.update_idletasks(); time.sleep(0.2)
-
-            # Step 3: Extract and Copy Preset Fonts (40%)
-            self.update_status("Extracting preset fonts...")
-            
-            if has_fonts_zip:
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    print(f"-> Found and extracting: Fonts.zip")
-                    try:
-                        with zipfile.ZipFile(source_fonts_zip, 'r') as zip_ref:
-                            zip_ref.extractall(temp_dir)
-                    except zipfile.BadZipFile:
-                        print(f"   [WARNING] Skipping corrupted zip file: Fonts.zip")
-
-                    copied_count = 0
-                    for root, _, files in os.walk(temp_dir):
-                        for file in files:
-                            if file.lower().endswith(('.ttf', '.otf')):
-                                try:
-                                    shutil.copy(os.path.join(root, file), destination_fonts_dir)
-                                    copied_count += 1
-                                except shutil.SameFileError:
-                                    pass
-                    print(f"-> Copied {copied_count} fonts from Fonts.zip.")
-            else:
-                print("-> No 'Fonts.zip' found. Skipping preset font copy.")
+        source_fonts_zip = os.path.join(installer_dir, 'Fonts.zip')
+        wheels_dir = os.path.join(installer_dir, WHEELS_DIR_NAME)
+        
+        print(f"Installer is running from: {installer_dir}")
+        print(f"Checking for preset fonts at: {source_fonts_zip}")
+        
+        has_fonts_zip = os.path.isfile(source_fonts_zip)
 
-            self.progress_bar['value'] = 40; self.root.update_idletasks(); time.sleep(0.2)
-            
-            # Step 4: Write Scripts (55%)
-            self.update_status("Writing script files...")
-            with open(os.path.join(self.install_dir, 'auto_font_manager.py'), 'w', encoding='utf-8') as f: f.write(AUTO_MANAGER_CODE)
-            with open(os.path.join(self.install_dir, 'manager.py'), 'w', encoding='utf-8') as f: f.write(MANAGER_HUB_CODE)
-            self.progress_bar['value'] = 55; self.root.update_idletasks(); time.sleep(0.2)
-            
-            # Step 5: Install Dependency (75%)
-            self.update_status("Installing required libraries (psutil)...")
-            subprocess.check_call([python_exe, "-m", "pip", "install", "psutil"], creationflags=subprocess.CREATE_NO_WINDOW)
-            self.progress_bar['value'] = 75; self.root.update_idletasks(); time.sleep(0.2)
-
-            # Step 6: Create Startup VBS (85%)
-            self.update_status("Setting up auto-start...")
-            vbs_path = os.path.join(os.getenv('APPDATA'), 'Microsoft', 'Windows', 'Start Menu', 'Programs', 'Startup', 'launch_roblox_font_manager.vbs')
-            script_to_run = os.path.join(self.install_dir, 'auto_font_manager.py')
-            vbs_content = f'Set WshShell = CreateObject("WScript.Shell")\nWshShell.Run """{pythonw_exe}"" ""{script_to_run}""", 0, false'
-            with open(vbs_path, 'w', encoding='utf-8') as f: f.write(vbs_content)
-            self.progress_bar['value'] = 85; self.root.update_idletasks(); time.sleep(0.2)
-            
-            # Step 7: Create Desktop Shortcut (95%)
-            self.create_desktop_shortcut(pythonw_exe)
-            self.progress_bar['value'] = 95; self.root.update_idletasks(); time.sleep(0.2)
-
-            # Step 8: Finalize (100%)
-            self.update_status("Installation complete!")
-            self.progress_bar['value'] = 100
-            print("--- Installation Successful ---")
-            
-            messagebox.showinfo("Success", "Installation successful! The font selector will now open.")
-            
-            self.root.destroy()
-            root = tk.Tk()
-            root.withdraw()
-            FontChooserApp(root, self.install_dir)
-            root.mainloop()
+        if not has_fonts_zip:
+            messagebox.showwarning("No Fonts Found", "A 'Fonts.zip' file was not found next to the installer.\n\nThe program will be installed, but you will need to add fonts manually later.")
+
+        self.events = queue.Queue()
+        self.phase_progress = dict.fromkeys(self.INSTALL_PHASE_WEIGHTS, 0.0)
+        self.phase_timings = {}
+        threading.Thread(target=self._install_worker, args=(source_fonts_zip if has_fonts_zip else None, wheels_dir if os.path.isdir(wheels_dir) else None), daemon=True).start()
+        self.root.after(50, self._poll_install_events)
 
+    def _install_worker(self, source_fonts_zip, wheels_dir=None):
+        """Worker thread: runs every install step and posts "status", "progress", "done" or "failed" events."""
+        started_at, started = datetime.now(), time.perf_counter()
+        ok = False
+        try:
+            with ThreadPoolExecutor(max_workers=3, thread_name_prefix="rfm-install") as executor:
+                (python_exe, pythonw_exe), destination_fonts_dir = self._run_parallel(executor, [
+                    ("find_python", self._step_find_python),
+                    ("directories", self._step_create_directories),
+                ])
+                self._run_parallel(executor, [
+                    ("preset_fonts", self._step_preset_fonts, source_fonts_zip, destination_fonts_dir),
+                    ("scripts", self._step_write_scripts, python_exe),
+                    ("dependencies", self._step_install_dependencies, python_exe, wheels_dir),
+                ])
+                self._run_parallel(executor, [
+                    ("startup", self._step_startup, pythonw_exe),
+                    ("shortcut", self.create_desktop_shortcut, pythonw_exe),
+                ])
+            ok = True
+            self.events.put(("done",))
         except Exception as e:
             print(f"\n--- INSTALLATION FAILED ---\n{traceback.format_exc()}")
-            messagebox.showerror("Installation Failed", f"An error occurred:\n\n{e}\n\nPlease check the console window for more details.")
-            self.progress_frame.pack_forget()
-            self.main_frame.pack(fill="both", expand=True)
+            self.events.put(("failed", e))
+        finally:
+            self._write_timing_report(started_at, time.perf_counter() - started, ok)
+
+    def _run_phase(self, name, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.phase_timings[name] = round(time.perf_counter() - started, 3)
+            self.set_phase_progress(name, 1.0)
+
+    def _run_parallel(self, executor, phases):
+        """Runs (name, func, *args) phases concurrently and returns their results, re-raising the first failure."""
+        futures = [executor.submit(self._run_phase, name, func, *args) for name, func, *args in phases]
+        return [future.result() for future in futures]
+
+    def _write_timing_report(self, started_at, total_seconds, ok):
+        report = {"started": started_at.isoformat(timespec='seconds'), "ok": ok, "total_seconds": round(total_seconds, 3), "phases": self.phase_timings}
+        print(f"Install timing: {json.dumps(report)}")
+        try:
+            with open(os.path.join(self.install_dir, self.INSTALL_TIMING_REPORT), 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        except OSError as e:
+            print(f"   [WARNING] Could not write install timing report: {e}")
+
+    # --- Install Steps (worker threads) ---
+    def _step_find_python(self):
+        found = self.find_python_executable()
+        if not found: raise Exception(f"Could not find Python {'.'.join(map(str, PYTHON_MIN_VERSION))} or newer with pythonw.exe. Please install Python from python.org or the Microsoft Store and try again.")
+        return found
+
+    def _step_create_directories(self):
+        self.update_status("Creating directories...")
+        os.makedirs(os.path.join(self.install_dir, "PLACE YOUR CUSTOM FONT HERE"), exist_ok=True)
+        destination_fonts_dir = os.path.join(self.install_dir, "Fonts")
+        os.makedirs(destination_fonts_dir, exist_ok=True)
+        return destination_fonts_dir
+
+    def _step_preset_fonts(self, source_fonts_zip, destination_fonts_dir):
+        if not source_fonts_zip:
+            print("-> No 'Fonts.zip' found. Skipping preset font copy.")
+            return
+        self.update_status("Extracting preset fonts...")
+        print(f"-> Found and streaming fonts from: Fonts.zip")
+        try:
+            stats = ingest_fonts_zip(source_fonts_zip, destination_fonts_dir, progress=lambda done, total: self.set_phase_progress("preset_fonts", done / max(total, 1)))
+            print(f"-> Copied {stats['fonts']} fonts from Fonts.zip ({stats['bytes_written'] / 1024 / 1024:.1f} MB written, "
+                  f"{stats['duplicates']} duplicate(s), {stats['unchanged']} already installed, {stats['errors']} unreadable).")
+        except zipfile.BadZipFile:
+            print(f"   [WARNING] Skipping corrupted zip file: Fonts.zip")
+
+    def _step_write_scripts(self, python_exe):
+        self.update_status("Writing script files...")
+        result = build_bundle(python_exe, self.install_dir)
+        if result["rewritten"]:
+            print(f"-> Built {BUNDLE_NAME} version {result['version']}: {len(result['compiled'])} module(s) compiled, {len(result['reused'])} reused.")
+        else:
+            print(f"-> {BUNDLE_NAME} version {result['version']} is already up to date.")
+        # Loose scripts from older versions are superseded by the bundle
+        for filename in [name for name in bundle_sources() if name != "__main__.py"]:
+            try: os.remove(os.path.join(self.install_dir, filename))
+            except OSError: pass
+        shutil.rmtree(os.path.join(self.install_dir, '__pycache__'), ignore_errors=True)
+
+    def _step_install_dependencies(self, python_exe, wheels_dir=None):
+        self.update_status("Checking required libraries (psutil)...")
+        version = installed_psutil_version(python_exe)
+        if version and version >= PSUTIL_MIN_VERSION:
+            print(f"-> psutil {'.'.join(map(str, version))} is already installed. Skipping pip.")
+            return
+        self.update_status("Installing required libraries (psutil)...")
+        attempts = ([pip_install_command(python_exe, "psutil", wheels_dir)] if wheels_dir else []) + [pip_install_command(python_exe, "psutil")]
+        for command in attempts:
+            try:
+                subprocess.check_call(command, creationflags=subprocess.CREATE_NO_WINDOW)
+                return
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"   [WARNING] '{' '.join(command[1:])}' failed: {e}")
+        # Not fatal: the auto manager detects Roblox without psutil, just less efficiently.
+        print("   [WARNING] psutil could not be installed. The font manager will use its built-in process detection.")
+
+    def _step_startup(self, pythonw_exe):
+        self.update_status("Setting up auto-start...")
+        vbs_path = os.path.join(os.getenv('APPDATA'), 'Microsoft', 'Windows', 'Start Menu', 'Programs', 'Startup', 'launch_roblox_font_manager.vbs')
+        bundle_path = os.path.join(self.install_dir, BUNDLE_NAME)
+        vbs_content = f'Set WshShell = CreateObject("WScript.Shell")\nWshShell.Run """{pythonw_exe}"" ""{bundle_path}"" auto", 0, false'
+        with open(vbs_path, 'w', encoding='utf-8') as f: f.write(vbs_content)
+
+    # --- UI Side (Tk thread) ---
+    def _poll_install_events(self):
+        try:
+            while True:
+                event = self.events.get_nowait()
+                if event[0] == "status":
+                    self.status_label['text'] = event[1]
+                elif event[0] == "progress":
+                    self.phase_progress[event[1]] = event[2]
+                    self.progress_bar['value'] = sum(self.INSTALL_PHASE_WEIGHTS[name] * done for name, done in self.phase_progress.items())
+                elif event[0] == "done":
+                    self._on_install_finished()
+                    return
+                elif event[0] == "failed":
+                    self._on_install_failed(event[1])
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(50, self._poll_install_events)
+
+    def _on_install_finished(self):
+        self.status_label['text'] = "Installation complete!"
+        self.progress_bar['value'] = 100
+        print("--- Installation Successful ---")
+        
+        messagebox.showinfo("Success", "Installation successful! The font selector will now open.")
+        
+        self.root.destroy()
+        root = tk.Tk()
+        root.withdraw()
+        FontChooserApp(root, self.install_dir)
+        root.mainloop()
+
+    def _on_install_failed(self, error):
+        messagebox.showerror("Installation Failed", f"An error occurred:\n\n{error}\n\nPlease check the console window for more details.")
+        self.progress_frame.pack_forget()
+        self.main_frame.pack(fill="both", expand=True)
 
     def update_status(self, text):
-        self.status_label['text'] = text
+        """Safe to call from any thread: the label is updated by _poll_install_events."""
         print(text)
-        self.root.update_idletasks()
+        self.events.put(("status", text))
+
+    def set_phase_progress(self, name, fraction):
+        self.events.put(("progress", name, fraction))
 
 
 def handle_exception(exc_type, exc_value, exc_traceback):
@@ -0,0 +1,102 @@
+"""Measures the cold-start import time of the generated scripts against a budget.
+
+Each script is imported in a fresh interpreter with `-X importtime`, several times,
+after untimed warm-up imports. The report has the median cumulative import time
+per script, the modules that cost the most, and whether the median stayed within
+the script's budget. The exit code is 1 if any script went over budget, so this
+can gate changes.
+
+Usage: python benchmarks/bench_import_time.py [--runs 9] [--warmup 2] [--budget auto_font_manager=90] [--output report.json]
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from embedded import install_embedded
+
+# Milliseconds of import time each script may take on top of a bare interpreter: about twice a
+# typical desktop median, so a busy machine stays within budget but a new heavy import does not.
+DEFAULT_BUDGETS_MS = {'auto_font_manager': 90, 'manager': 60}
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+def parse_importtime(stderr):
+    """Returns [(module, self_us, cumulative_us, depth)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+def measure(module, install_dir, env):
+    """Imports `module` once in a fresh interpreter. Returns (import rows, wall seconds)."""
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=install_dir, env=env,
+                         capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if out.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{out.stderr[-2000:]}")
+    return parse_importtime(out.stderr), wall
+
+def run(args):
+    install_dir = tempfile.mkdtemp(prefix='rfm_import_')
+    install_embedded(install_dir)
+    env = dict(os.environ, RFM_ROBLOX_VERSIONS_PATH=os.path.join(install_dir, 'Versions'), PYTHONDONTWRITEBYTECODE='')
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for item in args.budget:
+        name, _, ms = item.partition('=')
+        budgets[name] = float(ms)
+
+    baseline = statistics.median(measure('os', install_dir, env)[1] for _ in range(args.runs))
+    report = {'benchmark': 'import_time', 'timestamp': datetime.now().isoformat(timespec='seconds'),
+              'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+              'runs': args.runs, 'interpreter_wall_ms': round(baseline * 1000, 2), 'scripts': {}}
+    for module in args.scripts:
+        for _ in range(args.warmup): measure(module, install_dir, env) # Writes the .pyc files and warms the OS file cache
+        totals, walls, heaviest = [], [], {}
+        for _ in range(args.runs):
+            rows, wall = measure(module, install_dir, env)
+            walls.append(wall)
+            totals.append(next(cumulative for name, _, cumulative, depth in rows if name == module and depth == 0))
+            for name, self_us, _, _ in rows:
+                heaviest.setdefault(name, []).append(self_us)
+        import_ms = statistics.median(totals) / 1000
+        top = sorted(((name, statistics.median(v) / 1000) for name, v in heaviest.items()), key=lambda item: item[1], reverse=True)
+        report['scripts'][module] = {
+            'import_ms': round(import_ms, 2),
+            'wall_ms': round(statistics.median(walls) * 1000, 2),
+            'budget_ms': budgets.get(module),
+            'within_budget': module not in budgets or import_ms <= budgets[module],
+            'top_modules_self_ms': {name: round(ms, 2) for name, ms in top[:args.top]},
+        }
+    report['within_budget'] = all(s['within_budget'] for s in report['scripts'].values())
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scripts', nargs='+', default=list(DEFAULT_BUDGETS_MS))
+    parser.add_argument('--runs', type=int, default=9)
+    parser.add_argument('--warmup', type=int, default=2, help="Untimed imports of each script before measuring it")
+    parser.add_argument('--top', type=int, default=10, help="How many of the most expensive modules to list")
+    parser.add_argument('--budget', action='append', default=[], metavar='SCRIPT=MS', help="Override a script's budget")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0 if report['within_budget'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
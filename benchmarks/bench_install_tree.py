@@ -0,0 +1,132 @@
+"""Times the font manager's file operations against a synthetic Roblox install tree.
+
+Each repeat builds a fresh tree in a temp dir and then times, in order:
+get_roblox_versions(), the needs_font_update() scan (cold, then again on the
+unchanged tree), replace_fonts() on every
+updatable version, the manager's backup scan, and restoring the newest backup of
+every version. Results are JSON, so runs can be compared over time.
+
+Usage: python benchmarks/bench_install_tree.py [--versions 40] [--fonts 60] [--font-kb 64] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from embedded import load_embedded
+from synthetic_tree import font_bytes, generate_versions_tree
+
+OPERATIONS = ('get_roblox_versions', 'updatable_scan', 'updatable_rescan', 'replace_fonts', 'scan_for_backups', 'restore_backups')
+
+def timed(results, name, func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    results[name] = time.perf_counter() - start
+    return value
+
+def scan_for_backups(font_store, fonts_folders, index):
+    """What FontManagerApp.scan_for_backups() does for one target folder, without the UI."""
+    found, legacy = 0, 0
+    for fonts_folder in fonts_folders:
+        backups = font_store.list_backups(fonts_folder, index)
+        found += len(backups)
+        legacy += sum(1 for b in backups if font_store.read_manifest(os.path.join(fonts_folder, 'Fonts.old', b)) is None)
+    return found, legacy
+
+def restore_backups(module, font_store, fonts_folders):
+    """What FontManagerApp.run_undo_process() does for one folder: restore the newest backup."""
+    restored = 0
+    for fonts_folder in fonts_folders:
+        backups = font_store.list_backups(fonts_folder)
+        if backups:
+            restored += len(module.backup_stores.restore_backup(os.path.join(fonts_folder, 'Fonts.old', backups[0]), fonts_folder))
+    return restored
+
+def run_once(module, font_store, args, work_dir):
+    versions_root = os.path.join(work_dir, 'Versions')
+    module.ROBLOX_VERSIONS_PATH = versions_root
+    generate_versions_tree(versions_root, versions=args.versions, fonts=args.fonts, font_size=args.font_kb * 1024,
+                           changed_fonts=args.changed, processed=args.processed, history=args.history,
+                           store_root=os.path.join(work_dir, font_store.STORE_FOLDER_NAME), font_store=None if args.legacy else font_store, seed=args.seed)
+    source_font = os.path.join(work_dir, 'custom.ttf')
+    with open(source_font, 'wb') as f:
+        f.write(font_bytes(args.seed, -1, args.font_kb * 1024))
+
+    times, counts = {}, {}
+    module.dir_index.forget()
+    module.dir_index.stats.update(dict.fromkeys(module.dir_index.stats, 0))
+    versions = timed(times, 'get_roblox_versions', module.get_roblox_versions)
+    scan = lambda: [v for v in sorted(versions) if module.needs_font_update(v)]
+    updatable = timed(times, 'updatable_scan', scan)
+    timed(times, 'updatable_rescan', scan)
+    folders = [os.path.join(versions_root, v, 'content', 'fonts') for v in sorted(versions)]
+    deployer = module.FontDeployer(source_font, module.DEPLOY_MODE)
+    counts['replaced_versions'] = sum(timed(times, 'replace_fonts', lambda: [
+        module.replace_fonts(os.path.join(versions_root, v, 'content', 'fonts'), source_font, deployer) for v in updatable]))
+    index = sys.modules['font_index'].DirectoryIndex()
+    counts['backups_found'], counts['legacy_backups'] = timed(times, 'scan_for_backups', scan_for_backups, font_store, folders, index)
+    counts['files_restored'] = timed(times, 'restore_backups', restore_backups, module, font_store, folders)
+    counts['index'] = dict(module.dir_index.stats)
+    counts['versions'] = len(versions)
+    counts['updatable'] = len(updatable)
+    return times, counts
+
+def run(args):
+    install_dir = tempfile.mkdtemp(prefix='rfm_bench_')
+    try:
+        module = load_embedded('auto_font_manager', install_dir)
+        module.log_sink.echo = False
+        font_store = sys.modules['font_store']
+        sys.modules['font_index'].RACY_SECONDS = 0 # The tree was just generated, so every folder would count as freshly modified
+        runs = []
+        for i in range(args.repeat):
+            work_dir = os.path.join(install_dir, f'run{i}')
+            os.makedirs(work_dir)
+            runs.append(run_once(module, font_store, args, work_dir))
+            shutil.rmtree(work_dir, ignore_errors=True)
+        module.log_sink.flush()
+    finally:
+        shutil.rmtree(install_dir, ignore_errors=True)
+
+    results = {}
+    for name in OPERATIONS:
+        samples = [times[name] for times, _ in runs]
+        results[name] = {'min_seconds': round(min(samples), 6), 'median_seconds': round(statistics.median(samples), 6),
+                         'runs': [round(s, 6) for s in samples]}
+    return {
+        'benchmark': 'install_tree',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'counts': runs[-1][1],
+        'results': results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--versions', type=int, default=40)
+    parser.add_argument('--fonts', type=int, default=60, help="Font files per version")
+    parser.add_argument('--font-kb', type=int, default=64, help="Size of each font file")
+    parser.add_argument('--changed', type=int, default=3, help="Fonts that differ between versions")
+    parser.add_argument('--processed', type=float, default=0.5, help="Fraction of versions that already have a Fonts.old history")
+    parser.add_argument('--history', type=int, default=2, help="Backups per processed version")
+    parser.add_argument('--legacy', action='store_true', help="Write the history as old-style plain copies instead of manifests")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the JSON results here instead of stdout")
+    args = parser.parse_args()
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
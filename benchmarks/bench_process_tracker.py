@@ -0,0 +1,101 @@
+"""Benchmarks ProcessTracker against the old full process sweep on a synthetic process list.
+
+Every name or start-time read counts as a probe and is charged --probe-us on top of
+the measured time, since on a real machine each one is a system call.
+
+Usage: python benchmarks/bench_process_tracker.py [--processes 5000] [--cycles 1000] [--churn 5] [--probe-us 10]
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from embedded import load_embedded
+
+ROBLOX = "RobloxPlayerBeta.exe"
+
+class SyntheticProcessTable:
+    """A fake process table whose name and start-time reads are counted, standing in for psutil."""
+
+    def __init__(self, count, roblox_count, seed=0):
+        self.random = random.Random(seed)
+        self.next_pid = 1000
+        self.names = {}
+        self.started = {}
+        self.lookups = 0
+        self.stamp_reads = 0
+        # Roblox is launched after everything else, so it sits at the end of the PID order
+        for i in range(count - roblox_count):
+            self.spawn(f"proc{i}.exe")
+        for _ in range(roblox_count):
+            self.spawn(ROBLOX)
+
+    def spawn(self, name):
+        self.next_pid += self.random.randint(1, 8)
+        self.names[self.next_pid] = name
+        self.started[self.next_pid] = len(self.started)
+        return self.next_pid
+
+    def churn(self, count):
+        """Kills and spawns `count` ordinary processes, as a busy machine would between cycles."""
+        ordinary = [pid for pid, name in self.names.items() if name != ROBLOX]
+        for pid in self.random.sample(ordinary, min(count, len(ordinary))):
+            del self.names[pid]
+        for i in range(count):
+            self.spawn(f"new{self.next_pid}.exe")
+
+    def pids(self):
+        return list(self.names)
+
+    def stamp(self, pid):
+        self.stamp_reads += 1
+        return self.started.get(pid)
+
+    def name(self, pid):
+        self.lookups += 1
+        return self.names.get(pid)
+
+def full_sweep(table):
+    """The old detection: look up the name of every process, every cycle."""
+    return any(table.name(pid) == ROBLOX for pid in table.pids())
+
+def run(args):
+    module = load_embedded('auto_font_manager', tempfile.mkdtemp(prefix='rfm_bench_'))
+    results = {}
+    for label in ('full_sweep', 'process_tracker'):
+        table = SyntheticProcessTable(args.processes, args.roblox, seed=args.seed)
+        tracker = module.ProcessTracker(rescan_seconds=args.rescan_seconds, list_pids=table.pids, get_name=table.name, get_stamp=table.stamp)
+        start = time.perf_counter()
+        for _ in range(args.cycles):
+            table.churn(args.churn)
+            if label == 'full_sweep':
+                full_sweep(table)
+            else:
+                tracker.poll()
+        elapsed = time.perf_counter() - start
+        probes = table.lookups + table.stamp_reads
+        charged = elapsed + probes * args.probe_us / 1e6
+        results[label] = {
+            'seconds': round(elapsed, 6),
+            'ms_per_cycle': round(elapsed / args.cycles * 1000, 4),
+            'name_lookups': table.lookups,
+            'stamp_reads': table.stamp_reads,
+            'charged_ms_per_cycle': round(charged / args.cycles * 1000, 4),
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=5000)
+    parser.add_argument('--roblox', type=int, default=2, help="How many of the processes are Roblox")
+    parser.add_argument('--cycles', type=int, default=1000)
+    parser.add_argument('--churn', type=int, default=5, help="Processes replaced between cycles")
+    parser.add_argument('--rescan-seconds', type=float, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--probe-us', type=float, default=10, help="Cost charged per name or start-time read, in microseconds")
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+if __name__ == '__main__':
+    main()
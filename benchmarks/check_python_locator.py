@@ -0,0 +1,106 @@
+"""Checks the installer's PythonLocator against fake interpreters in temp folders.
+
+The fake install has a python.exe/pythonw.exe pair on PATH and several python*
+folders under two roots: some newer, one without its windowless interpreter,
+one too old. Versions come from a fake probe instead of running anything, so
+the check runs on any OS. It checks that the newest usable interpreter wins,
+that PATH wins a tie, that unusable ones are rejected, and that the cache is
+reused until an executable changes. Results are JSON; the exit status is 1 if
+any check failed.
+
+Usage: python benchmarks/check_python_locator.py [--output results.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from embedded import load_installer_definitions
+
+EXE, WINDOWED = 'python.exe', 'pythonw.exe'
+
+def fake_python(folder, version, windowed=True):
+    """Creates a dummy interpreter (and its windowless twin) and returns its path and version."""
+    os.makedirs(folder, exist_ok=True)
+    for name in (EXE, WINDOWED) if windowed else (EXE,):
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(b'MZ' + bytes(version))
+    return os.path.join(folder, EXE), version
+
+class FakeProbe:
+    """Answers like probe_python_version() from a table, and counts how often it was asked."""
+
+    def __init__(self, versions):
+        self.versions = {os.path.normcase(os.path.abspath(path)): version for path, version in versions}
+        self.calls = 0
+
+    def __call__(self, python_exe):
+        self.calls += 1
+        return self.versions.get(os.path.normcase(os.path.abspath(python_exe)))
+
+def run(args):
+    installer = load_installer_definitions('PYTHON_MIN_VERSION', 'PYTHON_PROBE_TIMEOUT_SECONDS', 'default_python_roots',
+                                           'probe_python_version', '_fingerprint', 'PythonLocator')
+    scratch = tempfile.mkdtemp(prefix='rfm-python-')
+    checks = {}
+    try:
+        on_path = os.path.join(scratch, 'bin')
+        root_a, root_b = os.path.join(scratch, 'RootA'), os.path.join(scratch, 'RootB')
+        path_311 = fake_python(on_path, (3, 11, 4))
+        root_311 = fake_python(os.path.join(root_a, 'Python311'), (3, 11, 4))
+        no_windowed = fake_python(os.path.join(root_a, 'Python313'), (3, 13, 0), windowed=False)
+        too_old = fake_python(os.path.join(root_a, 'Python37'), (3, 7, 9))
+        newest = fake_python(os.path.join(root_b, 'Python312'), (3, 12, 1))
+        not_python = fake_python(os.path.join(root_b, 'Tools'), (3, 14, 0))
+        probe = FakeProbe([path_311, root_311, no_windowed, too_old, newest, not_python])
+        missing_root = os.path.join(scratch, 'Missing')
+
+        def locator(roots, cache_path=None, probe=probe, **kwargs):
+            return installer.PythonLocator(cache_path=cache_path, roots=roots, path_dirs=['', f'"{on_path}"'],
+                                           exe_name=EXE, windowed_name=WINDOWED, probe=probe, **kwargs)
+
+        everything = locator([missing_root, root_a, root_b])
+        candidates = everything.candidates()
+        checks['path_listed_first'] = bool(candidates) and candidates[0] == path_311[0]
+        checks['only_python_folders_listed'] = not_python[0] not in candidates and len(candidates) == 5
+        choice = everything.discover()
+        checks['newest_wins'] = bool(choice) and choice['python'] == newest[0] and choice['version'] == list(newest[1])
+        checks['path_wins_tie'] = (locator([root_a]).discover() or {}).get('python') == path_311[0]
+        checks['missing_windowed_rejected'] = everything._check(no_windowed[0]) is None
+        checks['too_old_rejected'] = everything._check(too_old[0]) is None
+        checks['nothing_usable_is_none'] = locator([root_a], min_version=(3, 14)).discover() is None
+
+        cache_path = os.path.join(scratch, 'install', 'python_location.json')
+        with contextlib.redirect_stdout(io.StringIO()):
+            first = locator([root_a, root_b], cache_path).locate()
+            cached_probe = FakeProbe([path_311, root_311, no_windowed, too_old, newest])
+            cached = locator([root_a, root_b], cache_path, probe=cached_probe).locate()
+            checks['cache_reused_without_probing'] = cached == dict(first, fingerprint=cached.get('fingerprint')) and cached_probe.calls == 0
+            checks['cache_rejected_below_min_version'] = locator([root_a, root_b], cache_path, min_version=(3, 13)).load_cached() is None
+            with open(os.path.join(os.path.dirname(newest[0]), WINDOWED), 'ab') as f:
+                f.write(b'updated')
+            changed_probe = FakeProbe([path_311, root_311, no_windowed, too_old, newest])
+            rediscovered = locator([root_a, root_b], cache_path, probe=changed_probe).locate()
+            checks['cache_invalidated_by_change'] = changed_probe.calls > 0 and rediscovered['python'] == newest[0]
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return {'checks': checks, 'ok': all(checks.values())}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0 if report['ok'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
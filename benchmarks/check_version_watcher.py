@@ -0,0 +1,100 @@
+"""Checks the auto manager's VersionWatcher debounce against a fake versions root.
+
+For the polling backend and for this platform's native backend, in turn:
+a version folder that is still being written must not be reported until it
+has been quiet for the debounce time, a folder removed before it settles must
+not be reported at all, and folders that existed before the watcher started
+are left alone. Results are JSON; the exit status is 1 if any check failed.
+
+Usage: python benchmarks/check_version_watcher.py [--debounce 0.5] [--writes 6] [--output results.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from embedded import load_embedded
+
+def write_fonts(fonts_folder, writes, gap, stamps):
+    """Adds a font every `gap` seconds, like an updater still unpacking, and records when it last did."""
+    for i in range(writes):
+        with open(os.path.join(fonts_folder, f'font{i}.ttf'), 'wb') as f:
+            f.write(b'\0' * 64)
+        stamps['last_write'] = time.monotonic()
+        time.sleep(gap)
+
+def collect(watcher, seconds):
+    """Everything the watcher reports within `seconds`, with when each version was first reported."""
+    reported, deadline = {}, time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for version in watcher.wait(deadline - time.monotonic()):
+            reported.setdefault(version, time.monotonic())
+    return reported
+
+def check_backend(module, root, backend_name, args):
+    backend = module.PollingBackend(root, interval=0.05) if backend_name == 'poll' else module.open_change_backend(root)
+    watcher = module.VersionWatcher(root, debounce=args.debounce, backend=backend)
+    checks = {'backend': getattr(backend, 'name', type(backend).__name__)}
+    try:
+        # Still being written: only reported once the writes stop for a full debounce
+        fonts_folder = os.path.join(root, f'version-{backend_name}-busy', 'content', 'fonts')
+        os.makedirs(fonts_folder)
+        stamps = {'last_write': time.monotonic()}
+        writer = threading.Thread(target=write_fonts, args=(fonts_folder, args.writes, args.debounce / 3, stamps))
+        writer.start()
+        reported = collect(watcher, args.debounce * (args.writes / 3 + 4))
+        writer.join()
+        busy = f'version-{backend_name}-busy'
+        quiet = reported[busy] - stamps['last_write'] if busy in reported else None
+        checks['busy_reported'] = busy in reported
+        checks['busy_quiet_seconds'] = quiet
+        checks['busy_waited_for_debounce'] = quiet is not None and quiet >= args.debounce * 0.95
+
+        # Removed before it settled: never reported
+        gone = os.path.join(root, f'version-{backend_name}-gone')
+        os.makedirs(os.path.join(gone, 'content', 'fonts'))
+        time.sleep(args.debounce / 4)
+        shutil.rmtree(gone)
+        reported = collect(watcher, args.debounce * 3)
+        checks['gone_not_reported'] = os.path.basename(gone) not in reported
+        checks['existing_not_reported'] = 'version-existing' not in reported and busy not in reported
+    finally:
+        watcher.close()
+    checks['ok'] = all(checks[k] for k in ('busy_reported', 'busy_waited_for_debounce', 'gone_not_reported', 'existing_not_reported'))
+    return checks
+
+def run(args):
+    scratch = tempfile.mkdtemp(prefix='rfm-watcher-')
+    try:
+        root = os.path.join(scratch, 'Versions')
+        os.makedirs(os.path.join(root, 'version-existing', 'content', 'fonts'))
+        os.environ['RFM_ROBLOX_VERSIONS_PATH'] = root
+        module = load_embedded('auto_font_manager', os.path.join(scratch, 'install'))
+        report = {'debounce_seconds': args.debounce, 'writes': args.writes, 'backends': {}}
+        for backend_name in ('poll', 'native'):
+            report['backends'][backend_name] = check_backend(module, root, backend_name, args)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    report['ok'] = all(b['ok'] for b in report['backends'].values())
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--debounce', type=float, default=0.5, help="Watcher debounce in seconds")
+    parser.add_argument('--writes', type=int, default=6, help="Fonts written into the busy version, a third of the debounce apart")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0 if report['ok'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Loads the scripts embedded in Install.py as importable modules.
+
+Install.py only writes its embedded scripts during a real installation, and
+importing it pulls in the whole installer UI. The benchmarks instead read the
+script strings straight out of the source with `ast` and write them into a
+scratch install directory, so they run on any OS without a Windows install.
+Helpers of the installer itself are loaded the same way, one definition at a time.
+"""
+import ast
+import importlib
+import os
+import sys
+import types
+
+INSTALLER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Install.py')
+
+# Embedded source variable -> file name; shared modules are read from Install.py's SUPPORT_MODULES
+SCRIPT_FILES = {
+    'AUTO_MANAGER_CODE': 'auto_font_manager.py',
+    'MANAGER_HUB_CODE': 'manager.py',
+}
+
+def read_embedded_sources():
+    """Returns {file name: source} for every script and shared module the installer writes."""
+    with open(INSTALLER_PATH, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), INSTALLER_PATH)
+    constants, files = {}, dict(SCRIPT_FILES)
+    for node in tree.body:
+        if not (isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)):
+            continue
+        name = node.targets[0].id
+        if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            constants[name] = node.value.value
+        elif name == 'SUPPORT_MODULES' and isinstance(node.value, ast.Dict):
+            for key, value in zip(node.value.keys, node.value.values):
+                files[value.id] = key.value
+    return {filename: constants[name] for name, filename in files.items()}
+
+def install_embedded(install_dir):
+    """Writes every embedded script into `install_dir`, like step 4 of the installer."""
+    os.makedirs(install_dir, exist_ok=True)
+    for filename, source in read_embedded_sources().items():
+        with open(os.path.join(install_dir, filename), 'w', encoding='utf-8') as f:
+            f.write(source)
+
+def load_embedded(module_name, install_dir):
+    """Installs the embedded scripts into `install_dir` and imports `module_name` from there.
+
+    The scripts derive their install folder from sys.argv[0], so it is pointed at
+    the scratch directory while the module is imported.
+    """
+    install_embedded(install_dir)
+    if install_dir not in sys.path:
+        sys.path.insert(0, install_dir)
+    sys.modules.pop(module_name, None)
+    saved_argv = sys.argv
+    sys.argv = [os.path.join(install_dir, module_name + '.py')] + saved_argv[1:]
+    try:
+        return importlib.import_module(module_name)
+    finally:
+        sys.argv = saved_argv
+
+def load_installer_definitions(*names):
+    """Returns a module holding only the named top-level functions, classes and constants of Install.py.
+
+    The installer's own imports run first, skipping any this machine lacks (tkinter
+    on a headless box), so helpers like PythonLocator can be checked without the UI.
+    """
+    with open(INSTALLER_PATH, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), INSTALLER_PATH)
+    module = types.ModuleType('installer_definitions')
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            try:
+                exec(compile(ast.Module([node], []), INSTALLER_PATH, 'exec'), module.__dict__)
+            except ImportError:
+                continue
+    wanted, found = set(names), set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            name = node.name
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+        else:
+            continue
+        if name in wanted:
+            exec(compile(ast.Module([node], []), INSTALLER_PATH, 'exec'), module.__dict__)
+            found.add(name)
+    if wanted - found:
+        raise LookupError(f"Not defined at the top of Install.py: {', '.join(sorted(wanted - found))}")
+    return module
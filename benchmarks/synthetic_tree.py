@@ -0,0 +1,68 @@
+"""Generates fake Roblox install trees for the benchmarks.
+
+The layout matches a real install: Versions/version-<hash>/content/fonts/*.ttf next
+to a RobloxPlayerBeta.exe stub. Most fonts are byte-identical across versions, as
+they are in real Roblox updates, and only `changed_fonts` differ per version.
+Versions marked as processed get a Fonts.old history, either as legacy plain
+copies or, when a font_store module is passed, as manifest backups in its store.
+"""
+import os
+import random
+from datetime import datetime, timedelta
+
+EMOJI_FONTS = ('TwemojiMozilla.ttf',)
+
+def font_bytes(seed, index, size, revision=0):
+    """Deterministic pseudo-font content; the same (seed, index, revision) always gives the same bytes."""
+    rng = random.Random(f"{seed}:{index}:{revision}")
+    return b'\x00\x01\x00\x00' + rng.randbytes(max(size - 4, 0))
+
+def font_names(count):
+    names = [f"Font{i:03d}-Regular.ttf" for i in range(count - len(EMOJI_FONTS))]
+    return names + list(EMOJI_FONTS[:count])
+
+def write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def generate_versions_tree(versions_root, versions=20, fonts=60, font_size=64 * 1024, changed_fonts=3,
+                           processed=0.5, history=2, store_root=None, font_store=None, seed=0):
+    """Builds `versions` version folders under `versions_root` and returns a summary dict.
+
+    The first `processed` fraction of versions gets `history` Fonts.old backups. With
+    `font_store` (the embedded font_store module) and `store_root` they are written as
+    manifests into that store; otherwise as the plain copies older releases made.
+    """
+    rng = random.Random(seed)
+    names = font_names(fonts)
+    store = font_store.BackupStore(store_root) if font_store else None
+    summary = {"versions": [], "font_files": 0, "font_bytes": 0, "backups": 0}
+    processed_count = int(versions * processed)
+    for v in range(versions):
+        version = f"version-{rng.getrandbits(64):016x}"
+        version_dir = os.path.join(versions_root, version)
+        fonts_dir = os.path.join(version_dir, 'content', 'fonts')
+        os.makedirs(fonts_dir)
+        write_file(os.path.join(version_dir, 'RobloxPlayerBeta.exe'), b'MZ')
+        changed = set(rng.sample(range(len(names)), min(changed_fonts, len(names))))
+        for i, name in enumerate(names):
+            write_file(os.path.join(fonts_dir, name), font_bytes(seed, i, font_size, v if i in changed else 0))
+        summary["font_files"] += len(names)
+        summary["font_bytes"] += len(names) * font_size
+        if v < processed_count:
+            for h in range(history):
+                summary["backups"] += 1
+                backup_name = (datetime(2024, 1, 1) + timedelta(days=v, hours=h)).strftime('%Y-%m-%d_%H-%M-%S')
+                backup_path = os.path.join(fonts_dir, 'Fonts.old', backup_name)
+                os.makedirs(backup_path)
+                if store is None:
+                    for i, name in enumerate(names):
+                        write_file(os.path.join(backup_path, name), font_bytes(seed, i, font_size, v))
+                    continue
+                files = {}
+                for name in names:
+                    digest, size, _ = store.put(os.path.join(fonts_dir, name))
+                    files[name] = {"sha256": digest, "size": size, "mtime": os.path.getmtime(os.path.join(fonts_dir, name))}
+                font_store.write_manifest(backup_path, files)
+        summary["versions"].append(version)
+    return summary